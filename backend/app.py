@@ -1,10 +1,11 @@
 """
 Kitchen Assistant Flask App
 """
-from flask import Flask, jsonify
+from flask import Flask, jsonify, Response
 from flask_cors import CORS
 from routes.api import api_bp, init_services
 from services import AIService, SearchService, TimerService, MusicService
+from services import metrics
 from config import Config
 
 app = Flask(__name__)
@@ -14,7 +15,7 @@ CORS(app, resources={
     r"/api/*": {
         "origins": Config.ALLOWED_ORIGINS.split(",") if Config.ALLOWED_ORIGINS != '*' else '*',
         "methods": ["GET", "POST", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "ngrok-skip-browser-warning"],  # Added this!
+        "allow_headers": ["Content-Type", "ngrok-skip-browser-warning", "X-Session-ID"],  # Added this!
     }
 })
 
@@ -33,6 +34,10 @@ app.register_blueprint(api_bp)
 def health():
     return jsonify({'status': 'ok', 'services': 'running'})
 
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/')
 def index():
     return jsonify({'status': 'Kitchen Assistant API', 'version': '1.0'})
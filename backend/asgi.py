@@ -0,0 +1,45 @@
+"""
+Kitchen Assistant ASGI App — async serving mode
+Chat, advice, recipe, music search, the audio proxy and timer events
+run on the event loop; every other route falls through to the Flask app, so one
+process serves the whole API.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+import contextlib
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.routing import Mount
+from app import app as flask_app, ai_service, search_service, timer_service, music_service
+from routes.async_api import routes, init_services
+from services.http_pool import aclose_all
+from config import Config
+
+init_services(ai_service, search_service, timer_service, music_service)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    await aclose_all()
+
+
+app = Starlette(
+    routes=routes + [Mount('/', app=WSGIMiddleware(flask_app))],
+    middleware=[
+        Middleware(
+            CORSMiddleware,
+            allow_origins=Config.ALLOWED_ORIGINS.split(",") if Config.ALLOWED_ORIGINS != '*' else ['*'],
+            allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
+            allow_headers=["Content-Type", "ngrok-skip-browser-warning", "X-Session-ID"],
+        ),
+    ],
+    lifespan=lifespan,
+)
+
+if __name__ == '__main__':
+    import uvicorn
+    print("⚡ Async mode (ASGI)")
+    uvicorn.run(app, host=Config.HOST, port=Config.PORT)
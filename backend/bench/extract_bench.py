@@ -0,0 +1,69 @@
+"""
+HTML extraction benchmark
+Times services.html_extract against the old BeautifulSoup extraction on a
+large synthetic recipe page, with and without JSON-LD.
+
+    cd backend && python -m bench.extract_bench
+"""
+import json
+import time
+from bs4 import BeautifulSoup
+from config import Config
+from services.html_extract import extract_text
+
+PARAGRAPH = (
+    '<div class="c"><p>Step {i}: whisk   the eggs with <b>sugar</b>\n\n\n'
+    '      until pale, then fold in <a href="#">flour</a>.</p>'
+    '<script>track({i});</script>                    </div>\n'
+)
+RECIPE = {
+    '@context': 'https://schema.org',
+    '@type': 'Recipe',
+    'name': 'Sponge Cake',
+    'recipeYield': '8',
+    'prepTime': 'PT20M',
+    'cookTime': 'PT35M',
+    'recipeIngredient': ['4 eggs', '120 g sugar', '120 g flour'],
+    'recipeInstructions': [{'@type': 'HowToStep', 'text': 'Whisk eggs and sugar.'},
+                           {'@type': 'HowToStep', 'text': 'Fold in flour and bake.'}],
+}
+
+
+def page(paragraphs, json_ld=False):
+    head = '<html><head><title>Sponge Cake</title><style>p{margin:0}</style>'
+    if json_ld:
+        head += f'<script type="application/ld+json">{json.dumps(RECIPE)}</script>'
+    body = ''.join(PARAGRAPH.format(i=i) for i in range(paragraphs))
+    return (head + '</head><body><nav>Home Recipes</nav>' + body + '</body></html>').encode()
+
+
+def legacy_extract(content):
+    """The old SearchService._extract_text."""
+    soup = BeautifulSoup(content, 'html.parser')
+    for el in soup(['script', 'style', 'nav', 'footer', 'header', 'aside', 'iframe']):
+        el.decompose()
+    text = soup.get_text(separator=' ', strip=True)
+    lines = [l.strip() for l in text.split('\n') if l.strip()]
+    cleaned = ' '.join(lines)
+    while '  ' in cleaned:
+        cleaned = cleaned.replace('  ', ' ')
+    return cleaned[:Config.MAX_SCRAPE_CHARS]
+
+
+def bench(fn, content, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(content)
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    for label, content in (('plain page', page(20000)), ('JSON-LD page', page(20000, json_ld=True))):
+        print(f"{label}: {len(content) / 1e6:.1f} MB")
+        print(f"  legacy (bs4)   : {bench(legacy_extract, content, 3):8.2f} ms")
+        print(f"  html_extract   : {bench(lambda c: extract_text(c, Config.MAX_SCRAPE_CHARS), content, 20):8.2f} ms")
+        print(f"  -> {extract_text(content, Config.MAX_SCRAPE_CHARS)[:100]!r}")
+
+
+if __name__ == '__main__':
+    main()
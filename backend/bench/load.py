@@ -0,0 +1,276 @@
+"""
+Load benchmark — the API end to end against local stand-in upstreams
+Starts the fake Groq / Google / YouTube / recipe-site upstreams from
+bench/upstreams.py, boots the app on a local port (Flask, or the ASGI
+app under uvicorn) with its caches in a temp dir, and drives each
+scenario over HTTP from a pool of client threads. Reports p50/p90/p99
+latency and req/s per scenario; --save / --compare keep a baseline and
+fail the run when a scenario regresses past --tolerance.
+
+    cd backend && python -m bench.load
+    cd backend && python -m bench.load chat advice -c 16 -n 200
+    cd backend && python -m bench.load --server asgi --save baseline.json
+    cd backend && python -m bench.load --compare baseline.json
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import itertools
+import requests
+from bench.upstreams import Upstreams
+
+QUESTIONS = [
+    'how long should I boil an egg',
+    'how do I keep rice from getting sticky',
+    'what temperature should I roast a chicken at',
+    'why did my cake sink in the middle',
+    'how long do I rest a steak after cooking',
+    'what can I use instead of buttermilk',
+]
+CHAT_MESSAGES = QUESTIONS + [
+    'recipe with chicken and rice',
+    'what can I cook with eggs and spinach',
+    'tell me something fun about pasta',
+]
+INGREDIENTS = ['chicken and rice', 'eggs and spinach', 'beans and tortillas', 'salmon and potatoes']
+
+
+# ------------------------------------------
+# Scenarios: (session, i, args) -> response
+# ------------------------------------------
+
+def _vary(text, i, args):
+    # A distinct request number defeats the answer/search caches in cold runs.
+    return f"{text} {i}" if args.cold else text
+
+
+def chat(s, i, args):
+    msg = _vary(CHAT_MESSAGES[i % len(CHAT_MESSAGES)], i, args)
+    return s.post(f"{args.base}/api/chat", json={'message': msg, 'session_id': f"bench-{i}"})
+
+
+def advice(s, i, args):
+    q = _vary(QUESTIONS[i % len(QUESTIONS)], i, args)
+    return s.post(f"{args.base}/api/advice", json={'question': q, 'session_id': f"bench-{i}"})
+
+
+def recipe(s, i, args):
+    ing = _vary(INGREDIENTS[i % len(INGREDIENTS)], i, args)
+    return s.post(f"{args.base}/api/recipe", json={'ingredients': ing, 'session_id': f"bench-{i}"})
+
+
+def music_search(s, i, args):
+    q = _vary(f"cooking song {i % 10}", i, args)
+    return s.post(f"{args.base}/api/music/search", json={'query': q, 'max_results': 5})
+
+
+def music_stream(s, i, args):
+    video_id = f"v{i}" if args.cold else f"v{i % 4}"
+    r = s.get(f"{args.base}/api/music/stream/{video_id}")
+    r.content    # read the whole track
+    return r
+
+
+def timers(s, i, args):
+    return s.get(f"{args.base}/api/timers")
+
+
+def _timers_setup(s, args):
+    for n in range(10):
+        s.post(f"{args.base}/api/timer", json={'duration': f"{30 + n} minutes"})
+
+
+SCENARIOS = {
+    'chat': (chat, None),
+    'advice': (advice, None),
+    'recipe': (recipe, None),
+    'music_search': (music_search, None),
+    'music_stream': (music_stream, None),
+    'timers': (timers, _timers_setup),
+}
+
+
+# ------------------------------------------
+# Runner
+# ------------------------------------------
+
+def run_scenario(name, args):
+    fn, setup = SCENARIOS[name]
+    if setup:
+        setup(requests.Session(), args)
+    for i in range(args.warmup):
+        fn(requests.Session(), -1 - i, args)
+
+    counter = itertools.count()
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def worker():
+        s = requests.Session()
+        while True:
+            i = next(counter)
+            if i >= args.requests:
+                return
+            started = time.perf_counter()
+            try:
+                ok = fn(s, i, args).status_code < 400
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                errors[0] += not ok
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': round(len(latencies) / wall, 2),
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 1),
+        'p90_ms': round(_percentile(latencies, 90) * 1000, 1),
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 1),
+        'max_ms': round(latencies[-1] * 1000, 1) if latencies else 0.0,
+    }
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, -(-pct * len(sorted_values) // 100) - 1)    # nearest rank
+    return sorted_values[int(rank)]
+
+
+def start_app(server, port):
+    """Import and serve the app; upstream env vars must already be set."""
+    if server == 'asgi':
+        import uvicorn
+        from asgi import app
+        srv = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+        threading.Thread(target=srv.run, daemon=True).start()
+        while not srv.started:
+            time.sleep(0.05)
+        return
+    from werkzeug.serving import make_server
+    from app import app
+    srv = make_server('127.0.0.1', port, app, threaded=True)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+
+
+def compare(results, baseline, tolerance):
+    """Print deltas against a saved run; True if nothing regressed."""
+    ok = True
+    report(f"\n{'vs baseline':14} {'p50':>9} {'p99':>9} {'req/s':>9}")
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b:
+            continue
+        d50 = _delta(r['p50_ms'], b['p50_ms'])
+        d99 = _delta(r['p99_ms'], b['p99_ms'])
+        drps = _delta(r['rps'], b['rps'])
+        bad = d99 > tolerance or -drps > tolerance
+        ok = ok and not bad
+        report(f"{name:14} {d50:+8.0%} {d99:+8.0%} {drps:+8.0%}{'  REGRESSION' if bad else ''}")
+    return ok
+
+
+def report(*args):
+    print(*args, file=sys.__stdout__, flush=True)
+
+
+def _delta(now, before):
+    return (now - before) / before if before else 0.0
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    p.add_argument('scenarios', nargs='*', metavar='scenario',
+                   help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    p.add_argument('-c', '--concurrency', type=int, default=8)
+    p.add_argument('-n', '--requests', type=int, default=100, help='per scenario')
+    p.add_argument('--warmup', type=int, default=2)
+    p.add_argument('--server', choices=['flask', 'asgi'], default='flask')
+    p.add_argument('--port', type=int, default=5099)
+    p.add_argument('--warm', dest='cold', action='store_false',
+                   help='repeat requests so the app caches can hit')
+    p.add_argument('--groq-latency', type=float, default=0.3, help='seconds to first token')
+    p.add_argument('--groq-tokens', type=int, default=60)
+    p.add_argument('--groq-token-interval', type=float, default=0.01)
+    p.add_argument('--search-latency', type=float, default=0.2)
+    p.add_argument('--site-latency', type=float, default=0.05)
+    p.add_argument('--page-kb', type=int, default=300)
+    p.add_argument('--ytdlp-latency', type=float, default=0.4)
+    p.add_argument('--audio-kb', type=int, default=512)
+    p.add_argument('-v', '--verbose', action='store_true', help="show the app's own output")
+    p.add_argument('--save', metavar='FILE', help='write results as a baseline')
+    p.add_argument('--compare', metavar='FILE', help='compare with a saved baseline')
+    p.add_argument('--tolerance', type=float, default=0.2,
+                   help='allowed p99 increase / req/s drop before failing (0.2 = 20%%)')
+    args = p.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        p.error(f"unknown scenario: {', '.join(sorted(unknown))}")
+
+    upstreams = Upstreams(
+        groq_latency=args.groq_latency, groq_tokens=args.groq_tokens,
+        groq_token_interval=args.groq_token_interval,
+        search_latency=args.search_latency, site_latency=args.site_latency,
+        page_kb=args.page_kb, ytdlp_latency=args.ytdlp_latency,
+        audio_kb=args.audio_kb, unique=args.cold,
+    ).start()
+
+    tmp = tempfile.mkdtemp(prefix='kitchen-bench-')
+    if not args.verbose:
+        # Service prints and request logs go to a file; the report stays readable.
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        sys.stdout = open(os.path.join(tmp, 'app.log'), 'w')
+    os.environ.update({
+        'GROQ_API_KEY': 'bench',
+        'CACHE_DB_PATH': os.path.join(tmp, 'context.db'),
+        'URL_CACHE_PATH': os.path.join(tmp, 'audio_urls.db'),
+        'AUDIO_CACHE_DIR': os.path.join(tmp, 'audio'),
+        'TIMER_JOURNAL_PATH': os.path.join(tmp, 'timers.journal'),
+    })
+    start_app(args.server, args.port)
+    args.base = f"http://127.0.0.1:{args.port}"
+    if args.cold:
+        # Exact repeats never happen in cold runs; keep paraphrase hits out too.
+        import app as flask_app
+        flask_app.ai_service.answers.threshold = float('inf')
+
+    report(f"⚙️  {args.server}, {args.concurrency} clients, {args.requests} requests/scenario")
+    report(f"⚙️  {upstreams.describe()}\n")
+    report(f"{'scenario':14} {'reqs':>6} {'errors':>6} {'req/s':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    results = {}
+    for name in args.scenarios or list(SCENARIOS):
+        r = results[name] = run_scenario(name, args)
+        report(f"{name:14} {r['requests']:6} {r['errors']:6} {r['rps']:8.1f} "
+              f"{r['p50_ms']:9.1f} {r['p90_ms']:9.1f} {r['p99_ms']:9.1f} {r['max_ms']:9.1f}")
+    report(f"\nupstream calls: {upstreams.stats}")
+    if not args.verbose:
+        report(f"app output: {sys.stdout.name}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        report(f"💾 Saved baseline to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            if not compare(results, json.load(f), args.tolerance):
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Intent router micro-benchmark
+Times IntentRouter.classify against the old keyword chain on a mix of
+typical chat messages.
+
+    cd backend && python -m bench.router_bench
+"""
+import re
+import time
+from services.intent_router import IntentRouter
+
+MESSAGES = [
+    'play bohemian rhapsody',
+    'play jazz radio',
+    'stop music',
+    'next',
+    'unlike this song',
+    'set a timer for 10 minutes',
+    'timer 30 seconds',
+    'how long is a timer',
+    'start 5 min countdown',
+    'recipe with chicken and rice',
+    'what can I cook with eggs and spinach tonight',
+    'how long should I boil an egg',
+    'can I substitute butter for oil in brownies',
+    'I added too much salt to the soup',
+    'tell me a joke',
+    'thanks, that was delicious and the kids loved it',
+]
+
+
+def legacy_route(message):
+    """Classification part of the old any()-chain in route_message."""
+    msg = message.lower()
+    if msg.startswith('play ') and 'radio' not in msg and 'station' not in msg:
+        return 'play'
+    if any(w in msg for w in ['stop music', 'stop playing']):
+        return 'stop_music'
+    if msg in ['skip', 'next', 'next song']:
+        return 'skip'
+    if any(w in msg for w in ['like this', 'like song', 'love this', 'add to liked', 'save this song', 'favorite this']):
+        return 'like'
+    if any(w in msg for w in ['unlike', 'remove from liked', 'dislike this']):
+        return 'unlike'
+    if any(w in msg for w in ['timer', 'alarm', 'remind', 'countdown', 'set a', 'set for']):
+        return 'timer'
+    if re.search(r'(\d+)\s*(seconds?|secs?|minutes?|mins?|hours?|hrs?)', msg) and any(w in msg for w in ['set', 'start', 'count', 'put']):
+        return 'timer'
+    if any(w in msg for w in ['recipe', 'cook with', 'make with']):
+        return 'recipe'
+    if any(w in msg for w in ['how', 'what', 'why', 'when', 'substitute', 'too much']):
+        return 'advice'
+    return 'general'
+
+
+def bench(fn, rounds=2000):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for m in MESSAGES:
+            fn(m)
+    return (time.perf_counter() - start) / (rounds * len(MESSAGES)) * 1e6
+
+
+def main():
+    router = IntentRouter()
+    print(f"{'message':48} {'legacy':>10} {'router':>10}")
+    for m in MESSAGES:
+        intent = router.classify(m)
+        flag = '' if intent.name == legacy_route(m) else '  *'
+        print(f"{m[:48]:48} {legacy_route(m):>10} {intent.name:>10}{flag}  {intent.slots or ''}")
+    print()
+    print(f"legacy chain : {bench(legacy_route):6.2f} µs/message")
+    print(f"intent router: {bench(router.classify):6.2f} µs/message")
+    print("(* = routed differently)")
+
+
+if __name__ == '__main__':
+    main()
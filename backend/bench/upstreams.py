@@ -0,0 +1,252 @@
+"""
+Local stand-ins for the backend's upstreams
+- Groq: an HTTP server speaking the chat completions API (plain and
+  streamed), reached through GROQ_BASE_URL.
+- Recipe sites and googlevideo: one HTTP server serving the recipe page
+  fixture (with and without its JSON-LD, padded to a chosen size) and
+  audio bytes with Range support.
+- googlesearch and yt-dlp: replacement modules in sys.modules whose
+  results point at the local site server.
+Every stand-in sleeps for its configured latency, so runs are
+repeatable and need no network.
+"""
+import os
+import re
+import sys
+import json
+import time
+import types
+import zlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'recipe.html')
+JSON_LD_RE = re.compile(rb'<script type="application/ld\+json">.*?</script>', re.S)
+COMMENT = (
+    '<li class="comment"><div class="comment-author">Reader {i}</div><p>Made this '
+    'on a Tuesday and the whole family loved it. I used brown rice and added '
+    'ten extra minutes, and a squeeze of lemon at the end really helps.</p></li>\n'
+)
+REPLY = (
+    "Simmer it covered for 18 minutes, then rest 5 minutes before serving. "
+    "Use thighs for juicier meat and check it reaches 165F. "
+)
+
+
+class Upstreams:
+    def __init__(self, groq_latency=0.3, groq_token_interval=0.01, groq_tokens=60,
+                 search_latency=0.2, site_latency=0.05, page_kb=300,
+                 ytdlp_latency=0.4, audio_kb=512, unique=True):
+        self.groq_latency = groq_latency
+        self.groq_token_interval = groq_token_interval
+        self.groq_tokens = groq_tokens
+        self.search_latency = search_latency
+        self.site_latency = site_latency
+        self.ytdlp_latency = ytdlp_latency
+        self.unique = unique    # distinct URLs per query, so page caches miss
+        self.audio = bytes(range(256)) * (audio_kb * 4)
+        self.recipe_page, self.article_page = self._pages(page_kb * 1024)
+        self._servers = []
+        self.stats = {'groq': 0, 'search': 0, 'pages': 0, 'ytdlp': 0, 'audio_bytes': 0}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the servers, install the stub modules and point Groq here."""
+        groq = self._serve(_groq_handler(self))
+        site = self._serve(_site_handler(self))
+        self.groq_url = f"http://127.0.0.1:{groq.server_port}"
+        self.site_url = f"http://127.0.0.1:{site.server_port}"
+        os.environ['GROQ_BASE_URL'] = self.groq_url
+        sys.modules['googlesearch'] = self._googlesearch_module()
+        sys.modules['yt_dlp'] = self._yt_dlp_module()
+        return self
+
+    def stop(self):
+        for s in self._servers:
+            s.shutdown()
+            s.server_close()
+
+    def describe(self):
+        return (
+            f"groq {self.groq_latency * 1000:.0f}ms + {self.groq_tokens} tokens x "
+            f"{self.groq_token_interval * 1000:.0f}ms, search {self.search_latency * 1000:.0f}ms, "
+            f"sites {self.site_latency * 1000:.0f}ms ({len(self.article_page) // 1024}KB pages), "
+            f"yt-dlp {self.ytdlp_latency * 1000:.0f}ms, audio {len(self.audio) // 1024}KB, "
+            f"{'cold' if self.unique else 'warm'} caches"
+        )
+
+    def count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    # ------------------------------------------
+    # Internal helpers
+    # ------------------------------------------
+
+    def _serve(self, handler):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self._servers.append(server)
+        return server
+
+    @staticmethod
+    def _pages(size):
+        with open(FIXTURE, 'rb') as f:
+            page = f.read()
+        comments, i = [], 0
+        while len(page) + sum(map(len, comments)) < size:
+            comments.append(COMMENT.format(i=i).encode())
+            i += 1
+        page = page.replace(b'<!--comments-->', b''.join(comments))
+        return page, JSON_LD_RE.sub(b'', page)
+
+    def _googlesearch_module(self):
+        upstreams = self
+
+        def search(query, num_results=10, lang='en', **kwargs):
+            upstreams.count('search')
+            time.sleep(upstreams.search_latency)
+            key = zlib.crc32(query.encode()) if upstreams.unique else 0
+            for i in range(num_results):
+                kind = 'recipe' if i % 2 == 0 else 'article'
+                yield f"{upstreams.site_url}/{kind}/{key}-{i}"
+
+        module = types.ModuleType('googlesearch')
+        module.search = search
+        return module
+
+    def _yt_dlp_module(self):
+        upstreams = self
+
+        class YoutubeDL:
+            def __init__(self, params=None):
+                self.params = params or {}
+
+            def get_info_extractor(self, name):
+                return None
+
+            def close(self):
+                pass
+
+            def extract_info(self, url, download=False):
+                upstreams.count('ytdlp')
+                time.sleep(upstreams.ytdlp_latency)
+                if url.startswith('ytsearch'):
+                    n, query = url[len('ytsearch'):].split(':', 1)
+                    key = zlib.crc32(query.encode())
+                    entries = [self._entry(f"s{key}x{i}", f"{query} #{i}") for i in range(int(n))]
+                    return {'entries': entries}
+                video_id = url.rsplit('v=', 1)[-1]
+                return self._entry(video_id, f"Track {video_id}", resolved=True)
+
+            def _entry(self, video_id, title, resolved=False):
+                entry = {
+                    'id': video_id, 'title': title, 'duration': 215,
+                    'channel': 'Bench Records', 'thumbnails': [{'url': 'thumb.jpg'}],
+                }
+                if resolved or not self.params.get('extract_flat'):
+                    expire = int(time.time()) + 6 * 3600
+                    entry['url'] = f"{upstreams.site_url}/audio/{video_id}?expire={expire}"
+                    entry['acodec'] = 'mp4a.40.2'
+                    entry['ext'] = 'm4a'
+                return entry
+
+        module = types.ModuleType('yt_dlp')
+        module.YoutubeDL = YoutubeDL
+        return module
+
+
+def _groq_handler(upstreams):
+    class GroqHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            upstreams.count('groq')
+            words = (REPLY * 8).split()[:upstreams.groq_tokens]
+            time.sleep(upstreams.groq_latency)
+            if body.get('stream'):
+                self._stream(body, words)
+            else:
+                time.sleep(upstreams.groq_token_interval * len(words))
+                self._json(body, ' '.join(words))
+
+        def _json(self, body, text):
+            payload = json.dumps({
+                'id': 'chatcmpl-bench', 'object': 'chat.completion',
+                'created': int(time.time()), 'model': body.get('model', 'bench'),
+                'choices': [{
+                    'index': 0, 'finish_reason': 'stop',
+                    'message': {'role': 'assistant', 'content': text},
+                }],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _stream(self, body, words):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            for i, word in enumerate(words):
+                chunk = {
+                    'id': 'chatcmpl-bench', 'object': 'chat.completion.chunk',
+                    'created': int(time.time()), 'model': body.get('model', 'bench'),
+                    'choices': [{'index': 0, 'delta': {'content': word + ' '}, 'finish_reason': None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+                if i < len(words) - 1:
+                    time.sleep(upstreams.groq_token_interval)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+    return GroqHandler
+
+
+def _site_handler(upstreams):
+    class SiteHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.startswith('/audio/'):
+                return self._audio()
+            upstreams.count('pages')
+            time.sleep(upstreams.site_latency)
+            page = upstreams.recipe_page if self.path.startswith('/recipe/') else upstreams.article_page
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(page)))
+            self.end_headers()
+            self.wfile.write(page)
+
+        def _audio(self):
+            data = upstreams.audio
+            start, end = 0, len(data) - 1
+            m = re.match(r'bytes=(\d*)-(\d*)', self.headers.get('Range') or '')
+            if m and m.group(1):
+                start = int(m.group(1))
+                end = min(int(m.group(2)), end) if m.group(2) else end
+                self.send_response(206)
+                self.send_header('Content-Range', f"bytes {start}-{end}/{len(data)}")
+            else:
+                self.send_response(200)
+            self.send_header('Content-Type', 'audio/mp4')
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('Content-Length', str(end - start + 1))
+            self.end_headers()
+            self.wfile.write(data[start:end + 1])
+            upstreams.count('audio_bytes', end - start + 1)
+
+    return SiteHandler
@@ -6,6 +6,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 class Config:
     # Server
     HOST = '0.0.0.0'
@@ -17,6 +19,7 @@ class Config:
     
     # API Keys
     GROQ_API_KEY = os.getenv('GROQ_API_KEY')
+    GROQ_BASE_URL = os.getenv('GROQ_BASE_URL')   # None = Groq's public API
     
     # CORS - Add your Netlify domain
     ALLOWED_ORIGINS = os.getenv('ALLOWED_ORIGINS', '*')
@@ -24,8 +27,85 @@ class Config:
     # AI Settings
     CHAT_MODEL = 'llama-3.1-70b-versatile'
     MAX_HISTORY_MESSAGES = 10
+    SESSION_IDLE_TTL = 2 * 3600           # drop a kitchen's history after this idle time
+    MAX_SESSIONS = 500
+    SESSION_MEMORY_BYTES = 8 * 1024 * 1024
+    PROMPT_TOKEN_BUDGET = 1500    # whole prompt, estimated input tokens
+    CONTEXT_TOKEN_BUDGET = 700    # share of it for scraped web passages
+    PASSAGE_SENTENCES = 3         # sentences per ranked passage
+    ADVICE_RACE = True            # answer advice questions within a latency budget
+    ADVICE_LATENCY_BUDGET = 4.0   # seconds; past this the context-free answer is served
+    AI_RACE_WORKERS = 16          # threads for grounded replies being raced (sync mode)
     
+    # Answer cache (LLM replies reused for repeated / paraphrased questions)
+    ANSWER_CACHE_SIZE = 1000
+    ANSWER_CACHE_TTL = 24 * 3600
+    ANSWER_CACHE_THRESHOLD = 0.8  # cosine similarity needed to reuse an answer
+    ANSWER_CACHE_DIM = 1024       # hashed feature buckets
+
     # Search Settings
     MAX_SEARCH_RESULTS = 3
     SCRAPE_TIMEOUT = 10
-    MAX_SCRAPE_CHARS = 5000
\ No newline at end of file
+    MAX_SCRAPE_CHARS = 5000
+    SCRAPE_WORKERS = 6        # parallel page fetches
+    SCRAPE_DEADLINE = 6       # seconds for the whole scrape stage
+    SCRAPE_GOOD_RESULTS = 2   # stop once this many pages have text
+
+    # Web context cache (memory LRU + SQLite)
+    CACHE_DB_PATH = os.getenv('CACHE_DB_PATH', os.path.join(BASE_DIR, 'cache', 'context.db'))
+    CACHE_MEMORY_BYTES = 8 * 1024 * 1024
+    CACHE_DISK_BYTES = 200 * 1024 * 1024
+    SEARCH_CACHE_TTL = 24 * 3600      # URL lists per normalized query
+    PAGE_CACHE_TTL = 7 * 24 * 3600    # scraped page text per URL
+    CACHE_PURGE_INTERVAL = 300        # seconds between expired-entry sweeps
+
+    # Outbound HTTP (shared keep-alive pools)
+    HTTP_POOL_HOSTS = 20          # per-host pools kept per session
+    HTTP_POOL_MAXSIZE = 16        # connections kept per host
+    HTTP_RETRIES = 2
+    HTTP_BACKOFF = 0.3
+    STREAM_CONNECT_TIMEOUT = 5
+    STREAM_READ_TIMEOUT = 30
+
+    # Upstream circuit breakers and adaptive timeouts
+    UPSTREAM_TIMEOUTS = {         # seconds: (floor, default until measured, ceiling)
+        'groq': (2, 20, 30),
+        'google': (1, 5, 10),
+        'youtube': (3, 15, 30),
+    }
+    TIMEOUT_PERCENTILE = 0.99     # adaptive timeout = this latency percentile...
+    TIMEOUT_MULTIPLIER = 2.0      # ...times this, clamped to floor/ceiling
+    BREAKER_WINDOW = 20           # recent calls judged per upstream
+    BREAKER_MIN_CALLS = 5         # don't judge (or adapt) on fewer calls
+    BREAKER_FAILURE_RATE = 0.5    # open when this share of the window failed
+    BREAKER_LATENCY_SAMPLES = 100
+    BREAKER_OPEN_SECONDS = 15     # cool-down before a half-open probe
+    BREAKER_MAX_OPEN_SECONDS = 120  # doubles per failed probe up to this
+    RECENT_TRACKS = 200           # search results kept to answer while YouTube is down
+
+    # Timers
+    TIMER_HEARTBEAT = 15          # seconds between keep-alives on /timers/events
+    TIMER_JOURNAL_PATH = os.getenv('TIMER_JOURNAL_PATH', os.path.join(BASE_DIR, 'cache', 'timers.journal'))
+    TIMER_JOURNAL_COMPACT = 1000  # rewrite the journal past this many records
+    TIMER_OVERDUE_GRACE = 5       # timers that expired while down ring this long after startup
+
+    # Music
+    MUSIC_RESOLVE_WORKERS = 2     # background yt-dlp URL resolvers
+    YDL_POOL_SIZE = 3             # yt-dlp instances per option profile
+    YDL_MAX_USES = 50             # recycle an instance after this many lookups
+    URL_CACHE_PATH = os.getenv('URL_CACHE_PATH', os.path.join(BASE_DIR, 'cache', 'audio_urls.db'))
+    URL_CACHE_PERSIST = True      # keep resolved URLs across restarts
+    URL_CACHE_BYTES = 2 * 1024 * 1024
+    URL_CACHE_DEFAULT_TTL = 18000 # when the URL has no expire= parameter
+    URL_EXPIRY_MARGIN = 300       # treat URLs as stale this long before expiry
+    PREFETCH_AHEAD = 2            # queued tracks kept ready besides the current one
+    PREFETCH_BYTES = 256 * 1024   # head of each track warmed into the audio cache
+    PREFETCH_INTERVAL = 60        # seconds between freshness sweeps
+    PREFETCH_REFRESH_WINDOW = 1800  # re-resolve URLs this close to expiry
+    AUDIO_CACHE_DIR = os.getenv('AUDIO_CACHE_DIR', os.path.join(BASE_DIR, 'cache', 'audio'))
+    AUDIO_CACHE_BYTES = 2 * 1024 * 1024 * 1024
+    AUDIO_SEGMENT_BYTES = 256 * 1024
+    STREAM_CHUNK_MIN = 16 * 1024  # first upstream read, small for a fast first byte
+    STREAM_CHUNK_MAX = 1024 * 1024
+    STREAM_READAHEAD_CHUNKS = 4   # chunks buffered ahead of the client (0 = off)
+    STREAM_TARGET_READ_SECONDS = 0.25  # grow chunks while reads beat this
\ No newline at end of file
@@ -2,9 +2,17 @@
 API Routes — Chat, Recipes, Timers, Music
 """
 import re
-from flask import Blueprint, request, jsonify, Response
+import json
+import time
+import queue
+from flask import Blueprint, request, jsonify, Response, send_file, stream_with_context
 from datetime import datetime
-import requests as http_requests
+from werkzeug.exceptions import HTTPException
+from config import Config
+from services.intent_router import IntentRouter
+from services.kitchen_knowledge import KitchenKnowledge
+from services.metrics import REQUESTS
+from services.circuit_breaker import breaker_stats
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -12,6 +20,8 @@ ai_service = None
 search_service = None
 timer_service = None
 music_service = None
+intent_router = IntentRouter()
+kitchen_knowledge = KitchenKnowledge()
 
 
 def init_services(ai, search, timer, music):
@@ -22,13 +32,34 @@ def init_services(ai, search, timer, music):
     music_service = music
 
 
+def _session_id(data=None):
+    """Client session: X-Session-ID header, then JSON body, then remote IP."""
+    sid = request.headers.get('X-Session-ID') or (data or {}).get('session_id')
+    return str(sid or request.remote_addr or 'default')[:64]
+
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def _event_stream(gen):
+    return Response(
+        stream_with_context(gen),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
 # ===================== HEALTH =====================
 
 @api_bp.route('/health', methods=['GET'])
 def health():
+    upstreams = breaker_stats()
+    degraded = any(b['state'] != 'closed' for b in upstreams.values())
     return jsonify({
-        'status': 'healthy',
+        'status': 'degraded' if degraded else 'healthy',
         'timestamp': datetime.now().isoformat(),
+        'upstreams': upstreams,
     })
 
 
@@ -42,7 +73,7 @@ def chat():
         if not message:
             return jsonify({'error': 'No message'}), 400
 
-        result = process_message(message)
+        result = process_message(message, session_id=_session_id(data))
         return jsonify({
             'response': result['text'],
             'type': result.get('type', 'general'),
@@ -53,6 +84,46 @@ def chat():
         return jsonify({'error': str(e)}), 500
 
 
+@api_bp.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Server-Sent Events variant of /chat.
+    Emits `token` events as the model writes, then one `done` event
+    carrying the same fields /chat returns.
+    """
+    try:
+        data = request.get_json()
+        message = data.get('message', '').strip()
+        if not message:
+            return jsonify({'error': 'No message'}), 400
+        session_id = _session_id(data)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    def generate():
+        try:
+            result = process_message(message, stream=True, session_id=session_id)
+            text = result.get('text', '')
+            if 'stream' in result:
+                parts = []
+                for token in result['stream']:
+                    parts.append(token)
+                    yield _sse('token', {'text': token})
+                text = ''.join(parts).strip()
+            else:
+                yield _sse('token', {'text': text})
+            yield _sse('done', {
+                'response': text,
+                'type': result.get('type', 'general'),
+                'data': result.get('data'),
+                'timestamp': datetime.now().isoformat(),
+            })
+        except Exception as e:
+            yield _sse('error', {'error': str(e)})
+
+    return _event_stream(generate())
+
+
 # ===================== RECIPE =====================
 
 @api_bp.route('/recipe', methods=['POST'])
@@ -63,9 +134,12 @@ def recipe():
         if not ingredients:
             return jsonify({'error': 'No ingredients'}), 400
 
-        ctx = search_service.get_context(f"recipe with {ingredients}")
         prompt = f"Suggest 2-3 recipes using: {ingredients}"
-        resp = ai_service.chat(prompt, web_context=ctx)
+        session_id = _session_id(data)
+        resp = ai_service.cached_reply(prompt, session_id, similar=False)
+        if not resp:
+            ctx = search_service.get_context(f"recipe with {ingredients}")
+            resp = ai_service.chat(prompt, web_context=ctx, session_id=session_id)
         return jsonify({'response': resp, 'timestamp': datetime.now().isoformat()})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -105,6 +179,31 @@ def get_timers():
         return jsonify({'error': str(e)}), 500
 
 
+@api_bp.route('/timers/events', methods=['GET'])
+def timer_events():
+    """
+    Server-Sent Events for timers.
+    Starts with a `snapshot` of active timers, then pushes `set`,
+    `cancel` and `expired` events as they happen.
+    """
+    q, snapshot = timer_service.subscribe()
+
+    def generate():
+        try:
+            yield _sse('snapshot', {'timers': snapshot})
+            while True:
+                try:
+                    event, payload = q.get(timeout=Config.TIMER_HEARTBEAT)
+                except queue.Empty:
+                    yield ': ping\n\n'    # keeps proxies open, detects dead clients
+                    continue
+                yield _sse(event, payload)
+        finally:
+            timer_service.unsubscribe(q)
+
+    return _event_stream(generate())
+
+
 @api_bp.route('/timer/<int:timer_id>', methods=['DELETE'])
 def cancel_timer(timer_id):
     try:
@@ -114,6 +213,17 @@ def cancel_timer(timer_id):
         return jsonify({'error': str(e)}), 500
 
 
+@api_bp.route('/timers', methods=['DELETE'])
+def cancel_timers():
+    """Cancel all timers, or only those with ?label=..."""
+    try:
+        label = request.args.get('label')
+        n = timer_service.cancel_label(label) if label else timer_service.cancel_all()
+        return jsonify({'cancelled': n})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 # ===================== ADVICE =====================
 
 @api_bp.route('/advice', methods=['POST'])
@@ -124,13 +234,29 @@ def advice():
         if not question:
             return jsonify({'error': 'No question'}), 400
 
-        ctx = search_service.get_context(question)
-        resp = ai_service.chat(question, web_context=ctx)
+        session_id = _session_id(data)
+        resp = ai_service.cached_reply(question, session_id)
+        if not resp:
+            resp, _ = _advice_reply(question, question, session_id)
         return jsonify({'response': resp, 'timestamp': datetime.now().isoformat()})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+# ===================== CACHE =====================
+
+@api_bp.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    try:
+        return jsonify({
+            **search_service.cache.stats(),
+            'answers': ai_service.answers.stats(),
+            'context_coalescing': search_service.context_flight.stats(),
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 # ===================== MUSIC =====================
 
 @api_bp.route('/music/search', methods=['POST'])
@@ -141,7 +267,7 @@ def search_songs():
         if not query:
             return jsonify({'error': 'No query'}), 400
         max_r = data.get('max_results', 5)
-        tracks = music_service.search_songs(query, max_r)
+        tracks = music_service.search_songs(query, max_r, flat=True)
         return jsonify({'tracks': tracks, 'query': query})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -174,47 +300,48 @@ def get_audio(video_id):
 def stream_audio(video_id):
     """
     Proxy audio stream — works on old Safari.
-    The browser <audio> element points here.
+    The browser <audio> element points here. Bytes come from the local
+    audio cache when present; gaps are fetched upstream and cached.
     """
     try:
-        result = music_service.get_audio_url(video_id)
-        if result.get('status') != 'success':
-            return jsonify({'error': 'Audio not found'}), 404
-
-        headers = {
-            'User-Agent': (
-                'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-                'AppleWebKit/537.36 Chrome/120.0.0.0 Safari/537.36'
-            )
-        }
+        cache = music_service.audio_cache
+        cached = cache.complete_path(video_id)
+        if cached:
+            path, content_type = cached
+            return send_file(path, mimetype=content_type, conditional=True)
 
-        range_header = request.headers.get('Range')
-        if range_header:
-            headers['Range'] = range_header
+        start, end = _parse_range(request.headers.get('Range'))
 
-        r = http_requests.get(
-            result['audio_url'], headers=headers, stream=True, timeout=30
-        )
-
-        resp_headers = {
-            'Content-Type': r.headers.get('Content-Type', 'audio/mp4'),
-            'Accept-Ranges': 'bytes',
-        }
-        if 'Content-Length' in r.headers:
-            resp_headers['Content-Length'] = r.headers['Content-Length']
-        if 'Content-Range' in r.headers:
-            resp_headers['Content-Range'] = r.headers['Content-Range']
+        def resolve():
+            result = music_service.get_audio_url(video_id)
+            return result.get('audio_url') if result.get('status') == 'success' else None
 
-        def generate():
-            for chunk in r.iter_content(chunk_size=8192):
-                yield chunk
-
-        return Response(generate(), status=r.status_code, headers=resp_headers)
+        status, headers, body = cache.open(
+            video_id, resolve, start or 0, end, ranged=start is not None
+        )
+        response = Response(
+            music_service.stream_engine.track(body, label=video_id),
+            status=status, headers=headers, direct_passthrough=True,
+        )
+        response.call_on_close(body.close)    # even if the client left before the first byte
+        return response
 
+    except LookupError:
+        return jsonify({'error': 'Audio not found'}), 404
+    except HTTPException as e:
+        return e    # e.g. 416 from send_file for an unsatisfiable range
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _parse_range(range_header):
+    """(start, end) of a single 'bytes=a-b' range; (None, None) otherwise."""
+    m = re.fullmatch(r'bytes=(\d+)-(\d*)', (range_header or '').strip())
+    if not m:
+        return None, None
+    return int(m.group(1)), int(m.group(2)) if m.group(2) else None
+
+
 @api_bp.route('/music/queue', methods=['POST'])
 def queue_song():
     try:
@@ -270,6 +397,14 @@ def play_station():
         return jsonify({'error': str(e)}), 500
 
 
+@api_bp.route('/music/stats', methods=['GET'])
+def music_stats():
+    try:
+        return jsonify(music_service.get_stats())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @api_bp.route('/music/status', methods=['GET'])
 def music_status():
     try:
@@ -280,30 +415,91 @@ def music_status():
 
 # ===================== MESSAGE ROUTER =====================
 
-def process_message(message):
-    msg = message.lower()
-
-    # Play song
-    if msg.startswith('play ') and 'radio' not in msg and 'station' not in msg:
-        song = message[5:].strip()
-        if song:
-            result = music_service.play_song(song)
-            if result['status'] == 'playing':
-                t = result['track']
-                return {
-                    'text': f"🎵 Now playing: {t['title']} ({t['duration_str']})",
-                    'type': 'music_play',
-                    'data': result,
-                }
-            return {'text': f"Couldn't find '{song}'.", 'type': 'error'}
-
-    # Stop
-    if any(w in msg for w in ['stop music', 'stop playing']):
+def _ai_reply(message, kind, web_context=None, stream=False, session_id='default'):
+    if stream:
+        return {
+            'type': kind,
+            'stream': ai_service.chat_stream(
+                message, web_context=web_context, session_id=session_id
+            ),
+        }
+    resp = ai_service.chat(message, web_context=web_context, session_id=session_id)
+    return {'text': resp, 'type': kind}
+
+
+def _advice_reply(question, query, session_id):
+    """
+    (answer, source) for a cooking question. With ADVICE_RACE the web
+    search and a context-free answer run side by side and the reply is
+    ready within ADVICE_LATENCY_BUDGET; otherwise search, then answer.
+    """
+    if Config.ADVICE_RACE:
+        return ai_service.chat_raced(
+            question, lambda: search_service.get_context(query), session_id=session_id
+        )
+    ctx = search_service.get_context(query)
+    return ai_service.chat(question, web_context=ctx, session_id=session_id), 'grounded'
+
+
+def process_message(message, stream=False, session_id='default'):
+    """
+    Route a chat message to music, timers or the AI.
+    With stream=True, AI answers come back under 'stream' as a token
+    generator instead of 'text'.
+    """
+    started = time.perf_counter()
+    intent = intent_router.classify(message)
+    try:
+        result = route_message(message, intent)
+        if 'ai' not in result:
+            return result
+        cached = ai_service.cached_reply(message, session_id, similar=result['ai'] != 'recipe')
+        if cached:
+            return {'text': cached, 'type': result['ai'], 'data': {'source': 'cache'}}
+        if result['ai'] == 'advice' and not stream:
+            text, source = _advice_reply(message, result['search'], session_id)
+            return {'text': text, 'type': 'advice', 'data': {'source': source}}
+        ctx = search_service.get_context(result['search']) if result['search'] else None
+        return _ai_reply(message, result['ai'], ctx, stream, session_id)
+    finally:
+        # A streamed reply counts until its token stream is handed back;
+        # the stream itself is timed in AIService.
+        REQUESTS.observe(time.perf_counter() - started, intent.name)
+
+
+def route_message(message, intent=None):
+    """
+    Handle music and timer intents, and kitchen facts the local tables
+    can answer (conversions, oven temps, doneness, substitutions),
+    directly. For anything the AI should answer, return {'ai': <type>,
+    'search': <web query or None>} so sync and async callers can run the
+    search + LLM step their own way.
+    """
+    if intent is None:
+        intent = intent_router.classify(message)
+    name, slots = intent.name, intent.slots
+
+    if name == 'play':
+        # The router reads "play_song jazz" or "playé jazz" as the word
+        # "play" but the slot pattern doesn't match; use the text after it.
+        song = slots.get('song') or (message.split(None, 1) + [''])[1].strip()
+        if not song:
+            return {'text': "What should I play?", 'type': 'error'}
+        result = music_service.play_song(song)
+        if result['status'] == 'playing':
+            t = result['track']
+            return {
+                'text': f"🎵 Now playing: {t['title']} ({t['duration_str']})",
+                'type': 'music_play',
+                'data': result,
+            }
+        return {'text': f"Couldn't find '{song}'.", 'type': 'error'}
+
+    if name == 'stop_music':
         music_service.stop()
         return {'text': '🔇 Music stopped.', 'type': 'music'}
 
-    # Skip
-    if msg in ['skip', 'next', 'next song']:
+    if name == 'skip':
         r = music_service.skip()
         if r['status'] == 'playing':
             return {
@@ -313,8 +509,7 @@ def process_message(message):
             }
         return {'text': '📭 Queue is empty.', 'type': 'music'}
 
-        # Like current song
-    if any(w in msg for w in ['like this', 'like song', 'love this', 'add to liked', 'save this song', 'favorite this']):
+    if name == 'like':
         if music_service.current_track:
             return {
                 'text': f"❤️ Added '{music_service.current_track.get('title', 'Unknown')}' to your liked songs!",
@@ -323,8 +518,7 @@ def process_message(message):
             }
         return {'text': "No song is currently playing to like.", 'type': 'error'}
 
-    # Unlike / remove from liked
-    if any(w in msg for w in ['unlike', 'remove from liked', 'dislike this']):
+    if name == 'unlike':
         if music_service.current_track:
             return {
                 'text': f"💔 Removed '{music_service.current_track.get('title', 'Unknown')}' from liked songs.",
@@ -333,9 +527,8 @@ def process_message(message):
             }
         return {'text': "No song is currently playing.", 'type': 'error'}
 
-        # Timer
-    if any(w in msg for w in ['timer', 'alarm', 'remind', 'countdown', 'set a', 'set for']):
-        label, secs = timer_service.parse_duration(msg)
+    if name == 'timer':
+        label, secs = timer_service.parse_duration(message)
         if label:
             txt = timer_service.set_timer(label, secs)
             return {
@@ -343,38 +536,21 @@ def process_message(message):
                 'type': 'timer',
                 'data': {'label': label, 'seconds': secs},
             }
-        # If no duration found, ask AI but still mark as timer
         return {
             'text': "I couldn't understand the duration. Try saying 'set timer 5 minutes' or 'timer 30 seconds'.",
             'type': 'error',
         }
 
-    # Direct time mentions like "10 minutes", "5 seconds" (without timer keyword)
-    time_match = re.search(r'(\d+)\s*(seconds?|secs?|minutes?|mins?|hours?|hrs?)', msg)
-    if time_match and any(w in msg for w in ['set', 'start', 'count', 'put']):
-        label, secs = timer_service.parse_duration(msg)
-        if label:
-            txt = timer_service.set_timer(label, secs)
-            return {
-                'text': f"⏲️ {txt}",
-                'type': 'timer',
-                'data': {'label': label, 'seconds': secs},
-            }
-
-    # Recipe
-    if any(w in msg for w in ['recipe', 'cook with', 'make with']):
-        ctx = search_service.get_context(f"recipe {message}")
-        resp = ai_service.chat(message, web_context=ctx)
-        return {'text': resp, 'type': 'recipe'}
+    if name == 'recipe':
+        if 'ingredients' in slots:
+            return {'ai': 'recipe', 'search': f"recipe with {slots['ingredients']}"}
+        return {'ai': 'recipe', 'search': f"recipe {message}"}
 
-    # Cooking questions
-    if any(w in msg for w in ['how', 'what', 'why', 'when', 'substitute', 'too much']):
-        ctx = search_service.get_context(message)
-        resp = ai_service.chat(message, web_context=ctx)
-        return {'text': resp, 'type': 'advice'}
+    local = kitchen_knowledge.answer(message)
+    if local:
+        return {'text': local, 'type': 'advice', 'data': {'source': 'local'}}
 
-    # General
-    resp = ai_service.chat(message)
-    return {'text': resp, 'type': 'general'}
+    if name == 'advice':
+        return {'ai': 'advice', 'search': message}
 
-    
\ No newline at end of file
+    return {'ai': 'general', 'search': None}
@@ -0,0 +1,262 @@
+"""
+Async API Routes — Chat, Advice, Recipe, Music search & stream, Timer events
+Same JSON contracts as routes/api.py, served from the asyncio event
+loop so slow upstream calls don't each hold a worker thread.
+"""
+import time
+import asyncio
+from datetime import datetime
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from config import Config
+from services.metrics import REQUESTS
+from routes.api import route_message, intent_router, _parse_range, _sse
+
+_END = object()
+
+ai_service = None
+search_service = None
+timer_service = None
+music_service = None
+
+
+def init_services(ai, search, timer, music):
+    global ai_service, search_service, timer_service, music_service
+    ai_service = ai
+    search_service = search
+    timer_service = timer
+    music_service = music
+
+
+def _session_id(request: Request, data=None):
+    sid = request.headers.get('X-Session-ID') or (data or {}).get('session_id')
+    host = request.client.host if request.client else None
+    return str(sid or host or 'default')[:64]
+
+
+def _error(e, status=500):
+    return JSONResponse({'error': str(e)}, status_code=status)
+
+
+# ===================== CHAT =====================
+
+async def chat(request: Request):
+    try:
+        data = await request.json()
+        message = data.get('message', '').strip()
+        if not message:
+            return _error('No message', 400)
+
+        result = await process_message_async(message, _session_id(request, data))
+        return JSONResponse({
+            'response': result['text'],
+            'type': result.get('type', 'general'),
+            'data': result.get('data'),
+            'timestamp': datetime.now().isoformat(),
+        })
+    except Exception as e:
+        return _error(e)
+
+
+async def process_message_async(message, session_id='default'):
+    started = time.perf_counter()
+    intent = intent_router.classify(message)
+    try:
+        # Music/timer intents may call yt-dlp, which only has a blocking API.
+        result = await asyncio.to_thread(route_message, message, intent)
+        if 'ai' not in result:
+            return result
+        cached = ai_service.cached_reply(message, session_id, similar=result['ai'] != 'recipe')
+        if cached:
+            return {'text': cached, 'type': result['ai'], 'data': {'source': 'cache'}}
+        if result['ai'] == 'advice':
+            text, source = await _advice_reply(message, result['search'], session_id)
+            return {'text': text, 'type': 'advice', 'data': {'source': source}}
+        ctx = None
+        if result['search']:
+            ctx = await search_service.get_context_async(result['search'])
+        text = await ai_service.chat_async(message, web_context=ctx, session_id=session_id)
+        return {'text': text, 'type': result['ai']}
+    finally:
+        REQUESTS.observe(time.perf_counter() - started, intent.name)
+
+
+async def _advice_reply(question, query, session_id):
+    """Async twin of routes.api._advice_reply()."""
+    if Config.ADVICE_RACE:
+        return await ai_service.chat_raced_async(
+            question, lambda: search_service.get_context_async(query), session_id=session_id
+        )
+    ctx = await search_service.get_context_async(query)
+    text = await ai_service.chat_async(question, web_context=ctx, session_id=session_id)
+    return text, 'grounded'
+
+
+# ===================== RECIPE & ADVICE =====================
+
+async def recipe(request: Request):
+    try:
+        data = await request.json()
+        ingredients = data.get('ingredients', '').strip()
+        if not ingredients:
+            return _error('No ingredients', 400)
+
+        prompt = f"Suggest 2-3 recipes using: {ingredients}"
+        session_id = _session_id(request, data)
+        resp = ai_service.cached_reply(prompt, session_id, similar=False)
+        if not resp:
+            ctx = await search_service.get_context_async(f"recipe with {ingredients}")
+            resp = await ai_service.chat_async(prompt, web_context=ctx, session_id=session_id)
+        return JSONResponse({'response': resp, 'timestamp': datetime.now().isoformat()})
+    except Exception as e:
+        return _error(e)
+
+
+async def advice(request: Request):
+    try:
+        data = await request.json()
+        question = data.get('question', '').strip()
+        if not question:
+            return _error('No question', 400)
+
+        session_id = _session_id(request, data)
+        resp = ai_service.cached_reply(question, session_id)
+        if not resp:
+            resp, _ = await _advice_reply(question, question, session_id)
+        return JSONResponse({'response': resp, 'timestamp': datetime.now().isoformat()})
+    except Exception as e:
+        return _error(e)
+
+
+# ===================== MUSIC =====================
+
+async def search_songs(request: Request):
+    try:
+        data = await request.json()
+        query = data.get('query', '').strip()
+        if not query:
+            return _error('No query', 400)
+        max_r = data.get('max_results', 5)
+        tracks = await asyncio.to_thread(music_service.search_songs, query, max_r, True)
+        return JSONResponse({'tracks': tracks, 'query': query})
+    except Exception as e:
+        return _error(e)
+
+
+async def stream_audio(request: Request):
+    """
+    Audio proxy served from the same AudioCache as the Flask route, so
+    cached segments, prefetch warming and StreamEngine read-ahead apply
+    here too. The cache is blocking file and socket I/O, so the body is
+    read on worker threads.
+    """
+    try:
+        video_id = request.path_params['video_id']
+        start, end = _parse_range(request.headers.get('Range'))
+
+        def resolve():
+            result = music_service.get_audio_url(video_id)
+            return result.get('audio_url') if result.get('status') == 'success' else None
+
+        status, headers, body = await asyncio.to_thread(
+            music_service.audio_cache.open, video_id, resolve, start or 0, end,
+            ranged=start is not None,
+        )
+        tracked = music_service.stream_engine.track(body, label=video_id)
+
+        def close():
+            tracked.close()
+            body.close()    # even if the client left before the first byte
+
+        return StreamingResponse(
+            _iterate_in_thread(tracked, close), status_code=status, headers=headers
+        )
+
+    except LookupError:
+        return _error('Audio not found', 404)
+    except Exception as e:
+        return _error(e)
+
+
+async def _iterate_in_thread(iterator, close):
+    """
+    Async iterator over a blocking one, each next() on a worker thread.
+    close() runs once no next() is in flight, also when the client
+    disconnects mid-read (closing a generator another thread is running
+    raises).
+    """
+    loop = asyncio.get_running_loop()
+    pending = None
+    try:
+        while True:
+            pending = loop.run_in_executor(None, next, iterator, _END)
+            chunk = await asyncio.shield(pending)
+            pending = None
+            if chunk is _END:
+                return
+            yield chunk
+    finally:
+        if pending is not None:
+            await asyncio.wait([pending])
+        await asyncio.to_thread(close)
+
+
+# ===================== TIMERS =====================
+
+class _LoopSink:
+    """put() target for the timer thread that hands events to an
+    asyncio.Queue on the event loop."""
+
+    def __init__(self, q):
+        self._q = q
+        self._loop = asyncio.get_running_loop()
+
+    def put(self, item):
+        try:
+            self._loop.call_soon_threadsafe(self._q.put_nowait, item)
+        except RuntimeError:
+            pass    # loop already closed; unsubscribe is on its way
+
+
+async def timer_events(request: Request):
+    """
+    Server-Sent Events for timers, as routes/api.py:timer_events but on
+    the event loop: a listener holds no thread, and a client that goes
+    away is unsubscribed.
+    """
+    events = asyncio.Queue()
+    sink, snapshot = timer_service.subscribe(_LoopSink(events))
+
+    async def generate():
+        try:
+            yield _sse('snapshot', {'timers': snapshot})
+            idle = 0.0
+            while not await request.is_disconnected():
+                try:
+                    event, payload = await asyncio.wait_for(events.get(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    idle += 1.0
+                    if idle >= Config.TIMER_HEARTBEAT:
+                        idle = 0.0
+                        yield ': ping\n\n'    # keeps proxies open
+                    continue
+                idle = 0.0
+                yield _sse(event, payload)
+        finally:
+            timer_service.unsubscribe(sink)
+
+    return StreamingResponse(
+        generate(), media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+routes = [
+    Route('/api/chat', chat, methods=['POST']),
+    Route('/api/recipe', recipe, methods=['POST']),
+    Route('/api/advice', advice, methods=['POST']),
+    Route('/api/music/search', search_songs, methods=['POST']),
+    Route('/api/music/stream/{video_id}', stream_audio, methods=['GET']),
+    Route('/api/timers/events', timer_events, methods=['GET']),
+]
@@ -1,67 +1,362 @@
 """
 AI Service — Groq (Llama 3.1)
 """
-from groq import Groq
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from groq import Groq, AsyncGroq, APITimeoutError
 from config import Config
+from .session_store import SessionStore
+from .prompt_builder import PromptBuilder
+from .answer_cache import AnswerCache, is_follow_up
+from .metrics import SPANS, UPSTREAMS, span, upstream
+from .circuit_breaker import CircuitOpen, get_breaker
+
+DEFAULT_SESSION = 'default'
+
+SYSTEM_PROMPT = (
+    "You are a kitchen assistant. "
+    "Rules: "
+    "1. Reply in 1-5 short sentences MAX. "
+    "2. Be direct. No fluff, no greetings, no filler. "
+    "3. If giving a recipe, list only key steps in bullet points. "
+    "4. Use simple everyday language. "
+    "5. Never say 'Great question' or 'I'd be happy to help'. "
+    "6. Just answer."
+)
+
+UNAVAILABLE_REPLY = "I can't reach the assistant right now. Try again in a minute."
 
 
 class AIService:
     def __init__(self):
         if not Config.GROQ_API_KEY:
             raise ValueError("GROQ_API_KEY not configured")
-        self.client = Groq(api_key=Config.GROQ_API_KEY)
-        self.history = []
+        # No SDK retries: each call gets one adaptive timeout and counts
+        # once in the breaker, so a hung Groq fails fast.
+        self.client = Groq(
+            api_key=Config.GROQ_API_KEY, base_url=Config.GROQ_BASE_URL, max_retries=0
+        )
+        self.async_client = AsyncGroq(
+            api_key=Config.GROQ_API_KEY, base_url=Config.GROQ_BASE_URL, max_retries=0
+        )
+        self.sessions = SessionStore(
+            max_messages=Config.MAX_HISTORY_MESSAGES,
+            idle_ttl=Config.SESSION_IDLE_TTL,
+            max_sessions=Config.MAX_SESSIONS,
+            max_bytes=Config.SESSION_MEMORY_BYTES,
+        )
+        self.prompts = PromptBuilder()
+        self.answers = AnswerCache()
+        self.breaker = get_breaker('groq')
+        self._race_pool = ThreadPoolExecutor(
+            max_workers=Config.AI_RACE_WORKERS, thread_name_prefix='ai-race'
+        )
+        self._background = set()    # async grounded replies finishing past their budget
         print("✅ AI Service initialized")
 
-    def chat(self, message, web_context=None):
+    def cached_reply(self, message, session_id=DEFAULT_SESSION, similar=True):
+        """
+        A previous answer to the same or a near-identical question, or
+        None. Follow-ups that lean on the conversation are never served
+        from the cache. A hit is recorded in the session like a reply.
+        similar=False serves exact repeats only: recipe asks that differ
+        by one ingredient look alike but need a different answer.
+        """
+        if not self._cacheable(message, session_id):
+            return None
+        with span('ai.answer_cache'):
+            response = self.answers.get(message, similar=similar)
+        if response:
+            self._remember(session_id, message, response)
+            print("⚡ AI answer from cache:", response[:80])
+        return response
+
+    def chat(self, message, web_context=None, session_id=DEFAULT_SESSION):
+        cacheable = self._cacheable(message, session_id)
+        try:
+            response = self._complete(self._build_messages(message, web_context, session_id))
+            self._remember(session_id, message, response, cacheable)
+
+            print("✅ AI response:", response[:80])
+            return response
+
+        except Exception as e:
+            return self._failed(e, message, session_id)
+
+    async def chat_async(self, message, web_context=None, session_id=DEFAULT_SESSION):
+        """chat() for the async serving mode; awaits Groq without a thread."""
+        cacheable = self._cacheable(message, session_id)
+        try:
+            response = await self._complete_async(
+                self._build_messages(message, web_context, session_id)
+            )
+            self._remember(session_id, message, response, cacheable)
+
+            print("✅ AI response:", response[:80])
+            return response
+
+        except Exception as e:
+            return self._failed(e, message, session_id)
+
+    def chat_raced(self, message, fetch_context, budget=None, session_id=DEFAULT_SESSION):
+        """
+        Answer a question within `budget` seconds. A context-free reply
+        and fetch_context() + a grounded reply run together; the
+        grounded one wins if it is ready by the deadline, otherwise the
+        fast one is served and the grounded reply, when it lands, goes
+        to the answer cache for next time. Returns (text, source) with
+        source 'grounded', 'fast' or 'degraded' (no reply from Groq).
+        """
+        started = time.perf_counter()
+        deadline = started + (Config.ADVICE_LATENCY_BUDGET if budget is None else budget)
+        cacheable = self._cacheable(message, session_id)
+        # Both prompts use the history as it is now; by the time a late
+        # grounded reply is built, the fast Q/A is already in the session.
+        history = self.sessions.history(session_id)
+        fast_messages = self.prompts.build(SYSTEM_PROMPT, history, message)
+        grounded = self._race_pool.submit(self._grounded, message, fetch_context, history)
+        # The fast reply runs on this thread, so it never queues behind
+        # grounded replies still finishing for earlier requests. It gets
+        # what is left of the budget as its Groq timeout.
+        try:
+            fast = self._complete(fast_messages, timeout=self._remaining(deadline))
+            fast_error = None
+        except Exception as e:
+            fast, fast_error = None, e
+
+        response = source = None
+        try:
+            response = grounded.result(timeout=max(0.0, deadline - time.perf_counter()))
+            source = 'grounded' if response else None
+        except FuturesTimeout:
+            grounded.add_done_callback(lambda f: self._refine(message, f, cacheable))
+        except Exception as e:
+            print(f"❌ AI grounded answer error: {e}")
+        if not response:
+            if fast_error is not None:
+                return self._failed_race(fast_error, message, session_id)
+            response, source = fast, 'fast'
+        return self._settle(message, response, source, grounded, cacheable, session_id, started)
+
+    async def chat_raced_async(self, message, fetch_context, budget=None, session_id=DEFAULT_SESSION):
+        """chat_raced() for the async serving mode; fetch_context is a
+        coroutine function."""
+        started = time.perf_counter()
+        deadline = started + (Config.ADVICE_LATENCY_BUDGET if budget is None else budget)
+        cacheable = self._cacheable(message, session_id)
+        history = self.sessions.history(session_id)
+        fast = asyncio.create_task(self._complete_async(
+            self.prompts.build(SYSTEM_PROMPT, history, message), timeout=self._remaining(deadline),
+        ))
+        grounded = asyncio.create_task(self._grounded_async(message, fetch_context, history))
+
+        response = source = None
+        done, _ = await asyncio.wait({grounded}, timeout=max(0.0, deadline - time.perf_counter()))
+        if not done:
+            self._background.add(grounded)     # keep a reference while it finishes
+            grounded.add_done_callback(self._background.discard)
+            grounded.add_done_callback(lambda f: self._refine(message, f, cacheable))
+        elif grounded.exception():
+            print(f"❌ AI grounded answer error: {grounded.exception()}")
+        else:
+            response = grounded.result()
+            source = 'grounded' if response else None
+        if response:
+            fast.cancel()
+        else:
+            try:
+                response = await asyncio.wait_for(fast, self._remaining(deadline))
+                source = 'fast'
+            except asyncio.TimeoutError:
+                return self._failed_race(TimeoutError('no reply within the budget'), message, session_id)
+            except Exception as e:
+                return self._failed_race(e, message, session_id)
+        return self._settle(message, response, source, grounded, cacheable, session_id, started)
+
+    def chat_stream(self, message, web_context=None, session_id=DEFAULT_SESSION):
+        """
+        Same as chat() but yields text deltas as Groq produces them.
+        The full reply is recorded in the session once the stream ends.
+        """
+        started = time.perf_counter()
+        cacheable = self._cacheable(message, session_id)
         try:
-            messages = [{
-                "role": "system",
-                "content": (
-                    "You are a kitchen assistant. "
-                    "Rules: "
-                    "1. Reply in 1-5 short sentences MAX. "
-                    "2. Be direct. No fluff, no greetings, no filler. "
-                    "3. If giving a recipe, list only key steps in bullet points. "
-                    "4. Use simple everyday language. "
-                    "5. Never say 'Great question' or 'I'd be happy to help'. "
-                    "6. Just answer."
-                )
-            }]
-
-            for msg in self.history[-Config.MAX_HISTORY_MESSAGES:]:
-                messages.append(msg)
-
-            content = message
-            if web_context:
-                content = (
-                    f"Info:\n{web_context}\n\n"
-                    f"Question: {message}\n\n"
-                    "Answer in 1-2 sentences."
-                )
-
-            messages.append({"role": "user", "content": content})
+            self.breaker.acquire()
+        except CircuitOpen as e:
+            yield self._failed(e, message, session_id)
+            return
+        # The breaker judges the stream by its time to first token.
+        timeout = self.breaker.timeout()
+        parts, recorded = [], False
+        try:
+            stream = self.client.chat.completions.create(
+                model=Config.CHAT_MODEL,
+                messages=self._build_messages(message, web_context, session_id),
+                temperature=0.6,
+                max_tokens=150,
+                stream=True,
+                timeout=timeout,
+            )
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                if not parts:
+                    first = time.perf_counter() - started
+                    self.breaker.record(True, first, timeout)
+                    recorded = True
+                    SPANS.observe(first, 'ai.first_token')
+                    print(f"⚡ AI first token in {first:.2f}s")
+                parts.append(delta)
+                yield delta
+            if not recorded:
+                self.breaker.record(True, time.perf_counter() - started, timeout)
+                recorded = True
+        except Exception as e:
+            if not recorded:
+                self.breaker.record(False)
+                recorded = True
+            UPSTREAMS.observe(time.perf_counter() - started, 'groq_stream', 'error')
+            print(f"❌ AI stream error: {e}")
+            if not parts:
+                yield f"Error: {str(e)[:80]}"
+            return
+        finally:
+            if not recorded:
+                self.breaker.release()    # closed by the client before any token
+
+        elapsed = time.perf_counter() - started
+        UPSTREAMS.observe(elapsed, 'groq_stream', 'ok')
+        response = ''.join(parts).strip()
+        if response:
+            self._remember(session_id, message, response, cacheable)
+        print(f"✅ AI streamed in {elapsed:.2f}s:", response[:80])
+
+    def clear_history(self, session_id=DEFAULT_SESSION):
+        self.sessions.clear(session_id)
+
+    # ------------------------------------------
+    # Internal helpers
+    # ------------------------------------------
+
+    def _build_messages(self, message, web_context=None, session_id=DEFAULT_SESSION):
+        return self.prompts.build(
+            SYSTEM_PROMPT,
+            self.sessions.history(session_id),
+            message,
+            web_context,
+        )
+
+    def _complete(self, messages, timeout=None):
+        """One Groq completion through the breaker; raises CircuitOpen
+        at once while Groq is marked unavailable. `timeout` can only
+        shorten the breaker's adaptive timeout."""
+        timeout, neutral = self._timeout(timeout)
+        return self.breaker.call(self._create, messages, timeout, neutral=neutral)
+
+    async def _complete_async(self, messages, timeout=None):
+        timeout, neutral = self._timeout(timeout)
+        return await self.breaker.call_async(self._create_async, messages, timeout, neutral=neutral)
+
+    def _timeout(self, limit):
+        """(timeout, exceptions that are not Groq's fault). Running out of
+        a caller's budget shorter than the adaptive timeout says nothing
+        about Groq's health, so it must not count against the breaker."""
+        adaptive = self.breaker.timeout()
+        if limit is None or limit >= adaptive:
+            return adaptive, ()
+        return limit, (APITimeoutError,)
+
+    @staticmethod
+    def _remaining(deadline):
+        return max(0.1, deadline - time.perf_counter())
 
+    def _create(self, messages, timeout):
+        with upstream('groq'):
             completion = self.client.chat.completions.create(
                 model=Config.CHAT_MODEL,
                 messages=messages,
                 temperature=0.6,
                 max_tokens=150,
+                timeout=timeout,
             )
+        return completion.choices[0].message.content.strip()
 
-            response = completion.choices[0].message.content.strip()
+    async def _create_async(self, messages, timeout):
+        with upstream('groq'):
+            completion = await self.async_client.chat.completions.create(
+                model=Config.CHAT_MODEL,
+                messages=messages,
+                temperature=0.6,
+                max_tokens=150,
+                timeout=timeout,
+            )
+        return completion.choices[0].message.content.strip()
 
-            self.history.append({"role": "user", "content": message})
-            self.history.append({"role": "assistant", "content": response})
-            if len(self.history) > Config.MAX_HISTORY_MESSAGES * 2:
-                self.history = self.history[-Config.MAX_HISTORY_MESSAGES:]
+    def _grounded(self, message, fetch_context, history):
+        """Reply built on fetched web context; None when there is none."""
+        ctx = fetch_context()
+        if not ctx:
+            return None
+        return self._complete(self.prompts.build(SYSTEM_PROMPT, history, message, ctx))
 
-            print("✅ AI response:", response[:80])
-            return response
+    async def _grounded_async(self, message, fetch_context, history):
+        ctx = await fetch_context()
+        if not ctx:
+            return None
+        return await self._complete_async(self.prompts.build(SYSTEM_PROMPT, history, message, ctx))
 
-        except Exception as e:
-            print(f"❌ AI error: {e}")
-            return f"Error: {str(e)[:80]}"
+    def _settle(self, message, response, source, grounded, cacheable, session_id, started):
+        """Record the winning reply of a race. A fast reply is cached only
+        when the search found nothing, i.e. it is the best there will be."""
+        no_context = (
+            grounded.done() and not grounded.cancelled()
+            and grounded.exception() is None and grounded.result() is None
+        )
+        self._remember(session_id, message, response, cacheable and (source == 'grounded' or no_context))
+        elapsed = time.perf_counter() - started
+        SPANS.observe(elapsed, f'ai.race_{source}')
+        print(f"✅ AI {source} answer in {elapsed:.2f}s:", response[:80])
+        return response, source
+
+    def _refine(self, message, future, cacheable):
+        """A grounded reply that missed the budget: keep it for next time."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        response = future.result()
+        if response and cacheable:
+            self.answers.set(message, response)
+            print("🔁 AI grounded answer cached:", response[:80])
+
+    def _failed(self, error, message, session_id):
+        """Reply when Groq could not answer. While its breaker is open,
+        a saved answer to the same or a similar question is served,
+        labelled as such, else a short notice."""
+        if not isinstance(error, CircuitOpen):
+            print(f"❌ AI error: {error}")
+            return f"Error: {str(error)[:80]}"
+        print(f"🔌 AI degraded: {error}")
+        return self._fallback(message, session_id)
+
+    def _failed_race(self, error, message, session_id):
+        """A race with neither reply to serve: whatever went wrong, the
+        user gets the degraded fallback, never an error string."""
+        print(f"🔌 AI degraded: {error}")
+        return self._fallback(message, session_id), 'degraded'
+
+    def _fallback(self, message, session_id):
+        hit = self.answers.match(message) if self._cacheable(message, session_id) else None
+        if hit:
+            question, answer = hit
+            return f'(Offline — closest saved answer to "{question}") {answer}'
+        return UNAVAILABLE_REPLY
+
+    def _cacheable(self, message, session_id):
+        return not (self.sessions.history(session_id) and is_follow_up(message))
 
-    def clear_history(self):
-        self.history = []
\ No newline at end of file
+    def _remember(self, session_id, message, response, cache=False):
+        self.sessions.append(session_id, "user", message)
+        self.sessions.append(session_id, "assistant", response)
+        if cache:
+            self.answers.set(message, response)
@@ -0,0 +1,160 @@
+"""
+Answer Cache — reuse LLM answers for repeated and paraphrased questions
+Exact repeats hit on the normalized question. Otherwise the question is
+turned into a hashed TF-IDF vector (word unigrams + bigrams) and
+compared with every cached question in one NumPy matrix product; the
+best match above the threshold is served, provided both questions name
+the same content words ("brown rice" is not "rice"). Entries expire after a TTL
+and the least recently used go first when full.
+"""
+import time
+import zlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from config import Config
+from .prompt_builder import tokenize
+from .search_service import FILLER_WORDS, normalize_query
+
+# Words that point back at earlier turns ("what about with rice",
+# "can I freeze it") — the answer depends on the conversation.
+FOLLOW_UP_WORDS = {
+    'it', 'its', 'that', 'this', 'those', 'these', 'they', 'them', 'one',
+    'instead', 'also', 'another', 'again', 'more', 'else', 'same', 'then',
+}
+BIGRAM_WEIGHT = 0.5
+FOLLOW_UP_STARTS = ('and ', 'but ', 'what about', 'how about', 'or ', 'so ')
+
+
+def is_follow_up(message):
+    msg = message.lower().strip()
+    if msg.startswith(FOLLOW_UP_STARTS):
+        return True
+    words = msg.replace('?', ' ').replace(',', ' ').split()
+    return len(words) < 3 or any(w in FOLLOW_UP_WORDS for w in words)
+
+
+class AnswerCache:
+    def __init__(self, max_entries=None, ttl=None, threshold=None, dim=None):
+        self.max_entries = max_entries or Config.ANSWER_CACHE_SIZE
+        self.ttl = ttl or Config.ANSWER_CACHE_TTL
+        self.threshold = threshold or Config.ANSWER_CACHE_THRESHOLD
+        self.dim = dim or Config.ANSWER_CACHE_DIM
+        self._entries = OrderedDict()   # normalized question -> [row, answer, expires, question]
+        self._vectors = np.zeros((self.max_entries, self.dim), dtype=np.float32)
+        self._squares = np.zeros_like(self._vectors)    # for idf-weighted norms
+        self._row_keys = [None] * self.max_entries
+        self._row_words = [None] * self.max_entries    # content words, for near matches
+        self._free = list(range(self.max_entries - 1, -1, -1))
+        self._df = np.zeros(self.dim, dtype=np.float32)
+        self._lock = threading.Lock()
+        self._stats = {'exact_hits': 0, 'similar_hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0}
+
+    def get(self, question, similar=True):
+        """Cached answer for the question, or None. similar=False only
+        serves exact (normalized) repeats."""
+        hit = self.match(question, similar)
+        return hit[1] if hit else None
+
+    def match(self, question, similar=True):
+        """(cached question, answer) for the question, or None."""
+        key = normalize_query(question)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[2] > now:
+                self._entries.move_to_end(key)
+                self._stats['exact_hits'] += 1
+                return entry[3], entry[1]
+            if entry:
+                self._drop(key)
+
+            match = None
+            if similar:
+                words = self._words(question)
+                match = self._nearest(self._vector(words))
+                # A close vector can still add or drop a qualifier.
+                if match is not None and self._row_words[match] != set(words):
+                    match = None
+            if match is not None:
+                key = self._row_keys[match]
+                entry = self._entries[key]
+                if entry[2] > now:
+                    self._entries.move_to_end(key)
+                    self._stats['similar_hits'] += 1
+                    return entry[3], entry[1]
+                self._drop(key)
+
+            self._stats['misses'] += 1
+            return None
+
+    def set(self, question, answer):
+        key = normalize_query(question)
+        words = self._words(question)
+        vec = self._vector(words)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            while not self._free:
+                self._drop(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+            row = self._free.pop()
+            self._vectors[row] = vec
+            self._squares[row] = vec * vec
+            self._row_keys[row] = key
+            self._row_words[row] = set(words)
+            self._df += vec > 0
+            self._entries[key] = [row, answer, time.time() + self.ttl, question]
+            self._stats['sets'] += 1
+
+    def stats(self):
+        with self._lock:
+            hits = self._stats['exact_hits'] + self._stats['similar_hits']
+            lookups = hits + self._stats['misses']
+            return {
+                **self._stats,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'threshold': self.threshold,
+                'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+            }
+
+    # ------------------------------------------
+    # Internal helpers
+    # ------------------------------------------
+
+    def _words(self, text):
+        return [w[:-1] if len(w) > 3 and w.endswith('s') else w
+                for w in tokenize(text) if w not in FILLER_WORDS]
+
+    def _vector(self, words):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for w in words:
+            vec[zlib.crc32(w.encode()) % self.dim] += 1.0
+        for a, b in zip(words, words[1:]):     # bigrams keep some word order
+            vec[zlib.crc32(f"{a} {b}".encode()) % self.dim] += BIGRAM_WEIGHT
+        np.log1p(vec, out=vec)   # sublinear tf
+        return vec
+
+    def _nearest(self, vec):
+        n = len(self._entries)
+        if not n or not vec.any():
+            return None
+        # cos(v*idf, q*idf) without materialising the weighted matrix
+        idf2 = np.square(np.log((1 + n) / (1 + self._df)) + 1.0)
+        dots = self._vectors @ (vec * idf2)
+        norms = np.sqrt(self._squares @ idf2) * np.sqrt(vec * vec @ idf2)
+        sims = np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+        best = int(sims.argmax())
+        if sims[best] < self.threshold:
+            return None
+        return best
+
+    def _drop(self, key):
+        row = self._entries.pop(key)[0]
+        self._df -= self._vectors[row] > 0
+        self._vectors[row] = 0.0
+        self._squares[row] = 0.0
+        self._row_keys[row] = None
+        self._row_words[row] = None
+        self._free.append(row)
@@ -0,0 +1,381 @@
+"""
+Audio Cache — on-disk, segment-based cache for the stream proxy
+Each track is a sparse file plus a bitmap of which fixed-size segments
+are present. Range requests are served from disk where possible and
+gaps are filled from upstream (and written back) as they stream.
+Whole tracks are evicted least-recently-used when over the size cap.
+"""
+import os
+import json
+import time
+import threading
+from config import Config
+from .http_pool import get_session
+from .stream_engine import StreamEngine
+
+
+class UpstreamError(Exception):
+    pass
+
+
+class _Entry:
+    __slots__ = ('total', 'content_type', 'present', 'count', 'last_access', 'readers')
+
+    def __init__(self, total, content_type, segments):
+        self.total = total
+        self.content_type = content_type
+        self.present = bytearray(segments)
+        self.count = 0
+        self.last_access = time.time()
+        self.readers = 0     # open bodies; the track is not evicted while > 0
+
+    @property
+    def complete(self):
+        return self.count == len(self.present)
+
+
+class _Body:
+    """Response body that holds a reader reference on its entry until it
+    is exhausted or closed (closing one that never started is fine, and
+    also closes the upstream response open() made for it)."""
+
+    def __init__(self, cache, entry, chunks, first=None):
+        self._cache = cache
+        self._entry = entry
+        self._chunks = chunks
+        self._first = first
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if self._entry is not None:
+            self._chunks.close()
+            if self._first is not None:
+                self._first.close()     # unused if the generator never got to it
+                self._first = None
+            self._cache._release(self._entry)
+            self._entry = None
+
+
+class AudioCache:
+    def __init__(self, root=None, max_bytes=None, segment_size=None, engine=None):
+        self.root = root or Config.AUDIO_CACHE_DIR
+        self.max_bytes = max_bytes or Config.AUDIO_CACHE_BYTES
+        self.segment = segment_size or Config.AUDIO_SEGMENT_BYTES
+        self.engine = engine or StreamEngine()
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._size = 0
+        self._stats = {'hit_bytes': 0, 'fill_bytes': 0, 'evictions': 0}
+        os.makedirs(self.root, exist_ok=True)
+        self._load_index()
+
+    # ------------------------------------------
+    # Public API
+    # ------------------------------------------
+
+    def complete_path(self, video_id):
+        """Data file path if the whole track is on disk, else None."""
+        with self._lock:
+            e = self._entries.get(video_id)
+            if e and e.complete:
+                e.last_access = time.time()
+                return self._data_path(video_id), e.content_type
+        return None
+
+    def covers(self, video_id, start, end):
+        """True if bytes start..end of the track are all on disk."""
+        with self._lock:
+            e = self._entries.get(video_id)
+            if e is None:
+                return False
+            last = min(end, e.total - 1)
+            return all(e.present[start // self.segment:last // self.segment + 1])
+
+    def open(self, video_id, resolve_url, start=0, end=None, ranged=True):
+        """
+        Prepare a response for bytes start..end (inclusive, end=None for
+        the rest of the track). resolve_url() is only called if upstream
+        is needed. Returns (status, headers, body_iterator); the body
+        must be closed (or exhausted) to release the track for eviction.
+        """
+        with self._lock:
+            e = self._entries.get(video_id)
+            if e is not None:
+                e.readers += 1
+        first = None
+        if e is None:
+            audio_url = resolve_url()
+            if not audio_url:
+                raise LookupError('Audio not found')
+            # Ask for whole segments so the fill can be cached.
+            from_byte = start - start % self.segment
+            to_byte = '' if end is None else (end // self.segment + 1) * self.segment - 1
+            first = self._request(audio_url, from_byte, to_byte)
+            e = self._create(video_id, first)
+            url_holder = [audio_url]
+        else:
+            url_holder = []
+
+        if start >= e.total:
+            if first is not None:
+                first.close()
+            self._release(e)
+            return 416, {'Content-Range': f"bytes */{e.total}"}, iter(())
+
+        last = e.total - 1 if end is None else min(end, e.total - 1)
+        headers = {
+            'Content-Type': e.content_type,
+            'Accept-Ranges': 'bytes',
+            'Content-Length': str(last - start + 1),
+        }
+        if ranged:
+            headers['Content-Range'] = f"bytes {start}-{last}/{e.total}"
+
+        def url():
+            if not url_holder:
+                u = resolve_url()
+                if not u:
+                    raise UpstreamError('Audio URL unavailable')
+                url_holder.append(u)
+            return url_holder[0]
+
+        body = _Body(self, e, self._iter_range(video_id, e, url, start, last, first), first)
+        return (206 if ranged else 200), headers, body
+
+    def warm(self, video_id, audio_url, nbytes):
+        """Make sure the first nbytes of a track are on disk."""
+        _, _, body = self.open(video_id, lambda: audio_url, 0, nbytes - 1)
+        try:
+            for _ in body:
+                pass
+        finally:
+            body.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'tracks': len(self._entries),
+                'complete': sum(1 for e in self._entries.values() if e.complete),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'segment_bytes': self.segment,
+            }
+
+    # ------------------------------------------
+    # Internal helpers
+    # ------------------------------------------
+
+    def _iter_range(self, video_id, e, url, start, last, first=None):
+        pos = start
+        while pos <= last:
+            seg = pos // self.segment
+            if e.present[seg]:
+                seg_end = min((seg + 1) * self.segment, e.total) - 1
+                upto = min(seg_end, last)
+                with open(self._data_path(video_id), 'rb') as f:
+                    f.seek(pos)
+                    data = f.read(upto - pos + 1)
+                if len(data) != upto - pos + 1:
+                    raise UpstreamError('Cache file truncated')
+                self._count('hit_bytes', len(data))
+                e.last_access = time.time()
+                yield data
+                pos = upto + 1
+                continue
+
+            # Fill the run of missing segments up to the end of the range.
+            run_end = seg
+            last_seg = last // self.segment
+            while run_end < last_seg and not e.present[run_end + 1]:
+                run_end += 1
+            fetch_from = seg * self.segment
+            fetch_to = min((run_end + 1) * self.segment, e.total) - 1
+            if first is not None and self._starts_at(first) == fetch_from:
+                r, first = first, None
+            else:
+                if first is not None:
+                    first.close()
+                    first = None
+                r = self._request(url(), fetch_from, fetch_to)
+            pos = yield from self._fill(video_id, e, r, seg, run_end, pos, last)
+            if pos <= (run_end + 1) * self.segment - 1 and pos <= last:
+                raise UpstreamError('Upstream ended early')
+
+    def _fill(self, video_id, e, r, seg, run_end, pos, last):
+        """Stream one upstream response, yielding the requested bytes and
+        writing each completed segment to disk. Returns the new pos."""
+        stream_pos = seg * self.segment
+        buf = bytearray()
+        cur = seg
+        chunks = self.engine.read(r)
+        try:
+            for chunk in chunks:
+                a = max(pos, stream_pos)
+                b = min(last, stream_pos + len(chunk) - 1)
+                if a <= b:
+                    yield chunk[a - stream_pos:b - stream_pos + 1]
+                    pos = b + 1
+                stream_pos += len(chunk)
+                buf += chunk
+                while cur <= run_end and len(buf) >= self._seg_len(e, cur):
+                    n = self._seg_len(e, cur)
+                    self._write_segment(video_id, e, cur, bytes(buf[:n]))
+                    del buf[:n]
+                    cur += 1
+                if cur > run_end:
+                    break
+        finally:
+            chunks.close()    # releases the upstream connection
+        return pos
+
+    def _request(self, audio_url, from_byte, to_byte):
+        r = get_session('stream').get(
+            audio_url, headers={'Range': f"bytes={from_byte}-{to_byte}"}, stream=True,
+            timeout=(Config.STREAM_CONNECT_TIMEOUT, Config.STREAM_READ_TIMEOUT),
+        )
+        if r.status_code != 206 and not (r.status_code == 200 and from_byte == 0):
+            r.close()
+            raise UpstreamError(f"Upstream returned {r.status_code}")
+        return r
+
+    @staticmethod
+    def _starts_at(r):
+        cr = r.headers.get('Content-Range', '')
+        if cr.startswith('bytes '):
+            return int(cr[6:].split('-', 1)[0])
+        return 0
+
+    def _create(self, video_id, r):
+        cr = r.headers.get('Content-Range', '')
+        if '/' in cr and not cr.endswith('/*'):
+            total = int(cr.rsplit('/', 1)[1])
+        elif r.status_code == 200 and 'Content-Length' in r.headers:
+            total = int(r.headers['Content-Length'])
+        else:
+            r.close()
+            raise UpstreamError('Upstream did not report a size')
+        segments = (total + self.segment - 1) // self.segment
+        e = _Entry(total, r.headers.get('Content-Type', 'audio/mp4'), segments)
+        with self._lock:
+            # Two listeners starting the same track at once: the second
+            # shares the first one's entry instead of truncating its file.
+            existing = self._entries.get(video_id)
+            if existing is not None:
+                existing.readers += 1
+                return existing
+            with open(self._data_path(video_id), 'wb') as f:
+                f.truncate(total)
+            e.readers = 1
+            self._entries[video_id] = e
+        self._save_meta(video_id, e)
+        return e
+
+    def _seg_len(self, e, seg):
+        return min(self.segment, e.total - seg * self.segment)
+
+    def _write_segment(self, video_id, e, seg, data):
+        fd = os.open(self._data_path(video_id), os.O_WRONLY)
+        try:
+            os.pwrite(fd, data, seg * self.segment)
+        finally:
+            os.close(fd)
+        with self._lock:
+            if self._entries.get(video_id) is not e:
+                return    # dropped meanwhile (stale index on disk); don't count it
+            if not e.present[seg]:
+                e.present[seg] = 1
+                e.count += 1
+                self._size += len(data)
+                self._stats['fill_bytes'] += len(data)
+            e.last_access = time.time()
+        self._save_meta(video_id, e)
+        if self._size > self.max_bytes:
+            self._evict(keep=video_id)
+
+    def _evict(self, keep):
+        with self._lock:
+            victims = sorted(
+                (vid for vid, e in self._entries.items() if vid != keep and not e.readers),
+                key=lambda vid: self._entries[vid].last_access,
+            )
+            removed = []
+            for vid in victims:
+                if self._size <= self.max_bytes * 0.9:
+                    break
+                e = self._entries.pop(vid)
+                self._size -= self._entry_bytes(e)
+                self._stats['evictions'] += 1
+                removed.append(vid)
+        for vid in removed:
+            for path in (self._data_path(vid), self._meta_path(vid)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _release(self, e):
+        with self._lock:
+            e.readers -= 1
+
+    def _entry_bytes(self, e):
+        n = e.count * self.segment
+        if e.present and e.present[-1]:
+            n -= self.segment - self._seg_len(e, len(e.present) - 1)
+        return n
+
+    def _count(self, key, n):
+        with self._lock:
+            self._stats[key] += n
+
+    def _data_path(self, video_id):
+        return os.path.join(self.root, f"{video_id}.data")
+
+    def _meta_path(self, video_id):
+        return os.path.join(self.root, f"{video_id}.json")
+
+    def _save_meta(self, video_id, e):
+        tmp = f"{self._meta_path(video_id)}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({
+                'total': e.total,
+                'content_type': e.content_type,
+                'segment': self.segment,
+                'present': e.present.hex(),
+                'last_access': e.last_access,
+            }, f)
+        os.replace(tmp, self._meta_path(video_id))
+
+    def _load_index(self):
+        for name in os.listdir(self.root):
+            if not name.endswith('.json'):
+                continue
+            vid = name[:-5]
+            try:
+                with open(self._meta_path(vid)) as f:
+                    meta = json.load(f)
+                if meta['segment'] != self.segment or not os.path.exists(self._data_path(vid)):
+                    raise ValueError('stale entry')
+                e = _Entry(meta['total'], meta['content_type'], 0)
+                e.present = bytearray.fromhex(meta['present'])
+                e.count = sum(e.present)
+                e.last_access = meta['last_access']
+                self._entries[vid] = e
+                self._size += self._entry_bytes(e)
+            except Exception:
+                for path in (self._data_path(vid), self._meta_path(vid)):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+        if self._entries:
+            print(f"✅ Audio cache: {len(self._entries)} tracks, {self._size // (1024 * 1024)}MB")
@@ -0,0 +1,219 @@
+"""
+Tiered Cache — in-memory LRU in front of an on-disk SQLite store
+Entries live in namespaces, each with its own TTL.
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class TieredCache:
+    def __init__(self, path=None, memory_bytes=8_000_000, disk_bytes=200_000_000, ttls=None):
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.ttls = ttls or {}
+        self._mem = OrderedDict()   # (ns, key) -> (expires, value, size)
+        self._mem_size = 0
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._db = None
+        self._disk_size = 0
+        if path:
+            self._open(path)
+
+    # ------------------------------------------
+    # Public API
+    # ------------------------------------------
+
+    def get(self, ns, key):
+        now = time.time()
+        with self._lock:
+            st = self._stat(ns)
+            item = self._mem.get((ns, key))
+            if item:
+                if item[0] > now:
+                    self._mem.move_to_end((ns, key))
+                    st['memory_hits'] += 1
+                    return item[1]
+                self._drop_memory((ns, key))
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT value, expires, size FROM cache WHERE ns = ? AND key = ?',
+                    (ns, key),
+                ).fetchone()
+                if row and row[1] > now:
+                    self._db.execute(
+                        'UPDATE cache SET accessed = ? WHERE ns = ? AND key = ?',
+                        (now, ns, key),
+                    )
+                    value = json.loads(row[0])
+                    self._put_memory(ns, key, value, row[1], row[2])
+                    st['disk_hits'] += 1
+                    return value
+
+            st['misses'] += 1
+            return None
+
+    def set(self, ns, key, value, ttl=None):
+        if ttl is None:
+            ttl = self.ttls.get(ns, 3600)
+        blob = json.dumps(value)
+        size = len(blob) + len(key)
+        expires = time.time() + ttl
+        with self._lock:
+            self._stat(ns)['sets'] += 1
+            self._put_memory(ns, key, value, expires, size)
+            if self._db is not None:
+                self._put_disk(ns, key, blob, expires, size)
+
+    def delete(self, ns, key):
+        with self._lock:
+            self._drop_memory((ns, key))
+            if self._db is not None:
+                self._delete_disk(ns, key)
+
+    def purge_expired(self):
+        """Drop expired entries from both tiers. Returns how many went."""
+        now = time.time()
+        with self._lock:
+            dead = [k for k, v in self._mem.items() if v[0] <= now]
+            for k in dead:
+                self._drop_memory(k)
+            removed = len(dead)
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache WHERE expires <= ?',
+                    (now,),
+                ).fetchone()
+                self._db.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+                self._disk_size -= row[1]
+                removed += row[0]
+        return removed
+
+    def start_purging(self, interval=60):
+        """Purge expired entries from a daemon thread every `interval` s."""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.purge_expired()
+                except Exception as e:
+                    print(f"❌ Cache purge error: {e}")
+        threading.Thread(target=loop, name='cache-purge', daemon=True).start()
+
+    def stats(self):
+        with self._lock:
+            namespaces = {}
+            for ns, st in self._stats.items():
+                lookups = st['memory_hits'] + st['disk_hits'] + st['misses']
+                hits = st['memory_hits'] + st['disk_hits']
+                namespaces[ns] = {
+                    **st,
+                    'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+                }
+            return {
+                'memory': {
+                    'entries': len(self._mem),
+                    'bytes': self._mem_size,
+                    'max_bytes': self.memory_bytes,
+                },
+                'disk': {
+                    'enabled': self._db is not None,
+                    'bytes': self._disk_size,
+                    'max_bytes': self.disk_bytes,
+                },
+                'namespaces': namespaces,
+            }
+
+    # ------------------------------------------
+    # Internal helpers
+    # ------------------------------------------
+
+    def _open(self, path):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'ns TEXT, key TEXT, value TEXT, expires REAL, size INTEGER, accessed REAL, '
+                'PRIMARY KEY (ns, key))'
+            )
+            db.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)')
+            db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+            self._disk_size = db.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM cache'
+            ).fetchone()[0]
+            self._db = db
+        except Exception as e:
+            print(f"❌ Cache disk error: {e} (memory only)")
+            self._db = None
+
+    def _stat(self, ns):
+        st = self._stats.get(ns)
+        if st is None:
+            st = self._stats[ns] = {
+                'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+                'sets': 0, 'evictions': 0,
+            }
+        return st
+
+    def _put_memory(self, ns, key, value, expires, size):
+        if size > self.memory_bytes:
+            return
+        self._drop_memory((ns, key))
+        self._mem[(ns, key)] = (expires, value, size)
+        self._mem_size += size
+        while self._mem_size > self.memory_bytes:
+            k, _ = next(iter(self._mem.items()))
+            self._drop_memory(k)
+            self._stat(k[0])['evictions'] += 1
+
+    def _drop_memory(self, k):
+        item = self._mem.pop(k, None)
+        if item:
+            self._mem_size -= item[2]
+
+    def _put_disk(self, ns, key, blob, expires, size):
+        try:
+            self._delete_disk(ns, key)
+            self._db.execute(
+                'INSERT INTO cache (ns, key, value, expires, size, accessed) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (ns, key, blob, expires, size, time.time()),
+            )
+            self._disk_size += size
+            if self._disk_size > self.disk_bytes:
+                self._evict_disk()
+        except Exception as e:
+            print(f"❌ Cache write error: {e}")
+
+    def _delete_disk(self, ns, key):
+        row = self._db.execute(
+            'SELECT size FROM cache WHERE ns = ? AND key = ?', (ns, key)
+        ).fetchone()
+        if row:
+            self._db.execute('DELETE FROM cache WHERE ns = ? AND key = ?', (ns, key))
+            self._disk_size -= row[0]
+
+    def _evict_disk(self):
+        # Expired rows go first, then least recently used until 90% full.
+        self._db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        self._disk_size = self._db.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM cache'
+        ).fetchone()[0]
+        target = self.disk_bytes * 0.9
+        rows = self._db.execute(
+            'SELECT ns, key, size FROM cache ORDER BY accessed'
+        ).fetchall()
+        for ns, key, size in rows:
+            if self._disk_size <= target:
+                break
+            self._db.execute('DELETE FROM cache WHERE ns = ? AND key = ?', (ns, key))
+            self._disk_size -= size
+            self._stat(ns)['evictions'] += 1
@@ -0,0 +1,198 @@
+"""
+Circuit Breaker — fail fast when an upstream is unhealthy
+One breaker per upstream (Groq, Google, YouTube) watches a window of
+recent calls. When too many fail, or run past the upstream's adaptive
+timeout, it opens and calls are refused at once with CircuitOpen, so
+callers can serve a degraded answer instead of piling up threads.
+After a cool-down one half-open probe is let through: success closes
+the breaker, failure reopens it with a longer cool-down.
+
+The adaptive timeout is a percentile of recent successful latencies
+times a multiplier, clamped to the upstream's floor and ceiling.
+"""
+import time
+import asyncio
+import threading
+from collections import deque
+from config import Config
+from .metrics import Counter
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+EVENTS = Counter(
+    'kitchen_breaker_events_total',
+    'Circuit breaker transitions, refused calls and slow calls, by upstream',
+    ('upstream', 'event'),
+)
+
+_breakers = {}
+_lock = threading.Lock()
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, name, floor=1.0, default=10.0, ceiling=30.0):
+        self.name = name
+        self.floor = floor
+        self.ceiling = ceiling
+        self.state = CLOSED
+        self._default = default
+        self._timeout = default
+        self._outcomes = deque(maxlen=Config.BREAKER_WINDOW)          # True = ok
+        self._latencies = deque(maxlen=Config.BREAKER_LATENCY_SAMPLES)
+        self._cooldown = Config.BREAKER_OPEN_SECONDS
+        self._reopen_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'failures': 0, 'slow': 0, 'rejected': 0, 'opened': 0}
+
+    def timeout(self):
+        """Seconds to allow the next call."""
+        return self._timeout
+
+    def acquire(self):
+        """Ask to make a call; raises CircuitOpen if it may not. Every
+        successful acquire() must be followed by one record()."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() >= self._reopen_at:
+                self._transition(HALF_OPEN)
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self._stats['rejected'] += 1
+            retry_in = max(0.0, self._reopen_at - time.monotonic())
+        EVENTS.inc(self.name, 'rejected')
+        raise CircuitOpen(f"{self.name} is unavailable (retrying in {retry_in:.0f}s)")
+
+    def record(self, ok, latency=None, timeout=None):
+        """Outcome of an acquired call. A success slower than `timeout`
+        (default: the current adaptive timeout) counts as a failure."""
+        limit = self._timeout if timeout is None else timeout
+        slow = ok and latency is not None and latency > limit
+        with self._lock:
+            self._stats['calls'] += 1
+            if ok and latency is not None:
+                self._latencies.append(latency)
+                self._timeout = self._adapt()
+            failed = slow or not ok
+            if failed:
+                self._stats['slow' if slow else 'failures'] += 1
+            self._outcomes.append(not failed)
+
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if failed:
+                    self._cooldown = min(self._cooldown * 2, Config.BREAKER_MAX_OPEN_SECONDS)
+                    self._open()
+                else:
+                    self._cooldown = Config.BREAKER_OPEN_SECONDS
+                    self._outcomes.clear()
+                    self._transition(CLOSED)
+            elif self.state == CLOSED and failed and self._tripped():
+                self._open()
+        if slow:
+            EVENTS.inc(self.name, 'slow')
+
+    def release(self):
+        """Give back an acquired call that ended without an outcome
+        (cancelled, client went away)."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+
+    def call(self, fn, *args, neutral=(), **kwargs):
+        """fn(*args, **kwargs) under the breaker. Exceptions of the
+        `neutral` types end the call without an outcome, e.g. a timeout
+        set by the caller's budget rather than by the breaker."""
+        self.acquire()
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except neutral:
+            self.release()
+            raise
+        except Exception:
+            self.record(False)
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.record(True, time.perf_counter() - started)
+        return result
+
+    async def call_async(self, fn, *args, neutral=(), **kwargs):
+        """call() for coroutine functions. Cancellation is not a failure."""
+        self.acquire()
+        started = time.perf_counter()
+        try:
+            result = await fn(*args, **kwargs)
+        except (asyncio.CancelledError, *neutral):
+            self.release()
+            raise
+        except Exception:
+            self.record(False)
+            raise
+        self.record(True, time.perf_counter() - started)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'state': self.state,
+                'timeout': round(self._timeout, 3),
+                'window_failures': sum(1 for ok in self._outcomes if not ok),
+                'window_calls': len(self._outcomes),
+            }
+
+    # ------------------------------------------
+    # Internal helpers
+    # ------------------------------------------
+
+    def _tripped(self):
+        n = len(self._outcomes)
+        if n < Config.BREAKER_MIN_CALLS:
+            return False
+        failures = sum(1 for ok in self._outcomes if not ok)
+        return failures >= n * Config.BREAKER_FAILURE_RATE
+
+    def _open(self):
+        self._reopen_at = time.monotonic() + self._cooldown
+        self._stats['opened'] += 1
+        self._transition(OPEN)
+        print(f"🔌 {self.name} circuit open for {self._cooldown:.0f}s")
+
+    def _transition(self, state):
+        if state != self.state:
+            self.state = state
+            EVENTS.inc(self.name, state)
+            if state == CLOSED:
+                print(f"✅ {self.name} circuit closed")
+
+    def _adapt(self):
+        if len(self._latencies) < Config.BREAKER_MIN_CALLS:
+            return self._default
+        ordered = sorted(self._latencies)
+        p = ordered[min(len(ordered) - 1, int(len(ordered) * Config.TIMEOUT_PERCENTILE))]
+        return min(self.ceiling, max(self.floor, p * Config.TIMEOUT_MULTIPLIER))
+
+
+def get_breaker(name):
+    """Shared breaker for an upstream named in Config.UPSTREAM_TIMEOUTS."""
+    b = _breakers.get(name)
+    if b is None:
+        with _lock:
+            b = _breakers.get(name)
+            if b is None:
+                floor, default, ceiling = Config.UPSTREAM_TIMEOUTS[name]
+                b = _breakers[name] = CircuitBreaker(name, floor, default, ceiling)
+    return b
+
+
+def breaker_stats():
+    return {name: b.stats() for name, b in sorted(_breakers.items())}
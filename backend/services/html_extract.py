@@ -0,0 +1,196 @@
+"""
+HTML Extract — page text for the LLM context, fast
+Recipe pages usually embed a schema.org Recipe as JSON-LD; when they do
+that is used directly (title, times, ingredients, steps) since it is far
+denser than the page text. Otherwise the page is fed to lxml's pull
+parser in chunks, text outside boilerplate tags is collected in
+document order, and parsing stops as soon as enough text is in hand.
+The charset comes from the HTTP header, else the page's <meta>, else
+UTF-8.
+"""
+import re
+import json
+import codecs
+from lxml import etree
+
+SKIP_TAGS = {
+    'script', 'style', 'nav', 'footer', 'header', 'aside', 'iframe',
+    'noscript', 'svg', 'form', 'button', 'template', 'select',
+}
+FEED_BYTES = 64 * 1024
+
+WS_RE = re.compile(r'\s+')
+JSON_LD_RE = re.compile(
+    rb'<script[^>]*application/ld\+json[^>]*>(.*?)</script>', re.I | re.S
+)
+CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset', re.I)
+ISO_DURATION_RE = re.compile(r'^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:\d+S)?)?$')
+
+
+def extract_text(content, limit, content_type=None):
+    """Useful text from an HTML document (bytes), at most `limit` chars.
+    content_type is the response's Content-Type header, for its charset."""
+    encoding = charset(content_type)
+    if encoding is None and not META_CHARSET_RE.search(content, 0, 4096):
+        encoding = 'utf-8'      # nothing declared; libxml2 would assume Latin-1
+    recipe = recipe_text(content, encoding)
+    if recipe:
+        return recipe[:limit]
+    return page_text(content, limit, encoding)
+
+
+def charset(content_type):
+    """Python codec name from a Content-Type header, or None."""
+    m = CHARSET_RE.search(content_type or '')
+    if not m:
+        return None
+    try:
+        return codecs.lookup(m.group(1)).name
+    except LookupError:
+        return None
+
+
+def page_text(content, limit, encoding=None):
+    """encoding=None lets lxml read it from the page's <meta>."""
+    parser = etree.HTMLPullParser(
+        events=('start', 'end'), remove_comments=True, encoding=encoding
+    )
+    parts = []
+    size = 0
+    skip = 0
+
+    def emit(text):
+        nonlocal size
+        if text and not skip:
+            text = WS_RE.sub(' ', text).strip()
+            if text:
+                parts.append(text)
+                size += len(text) + 1
+
+    # Text is emitted once it is complete: a node's leading text when its
+    # first child starts, a child's tail when the next sibling starts or
+    # the parent ends. That keeps document order without a full tree walk.
+    def drain():
+        nonlocal skip
+        for event, el in parser.read_events():
+            tag = el.tag if isinstance(el.tag, str) else ''
+            if event == 'start':
+                prev = el.getprevious()
+                if prev is not None:
+                    emit(prev.tail)
+                elif el.getparent() is not None:
+                    emit(el.getparent().text)
+                if tag in SKIP_TAGS:
+                    skip += 1
+            else:
+                last = el[-1] if len(el) else None
+                emit(last.tail if last is not None else el.text)
+                if tag in SKIP_TAGS:
+                    skip -= 1
+                el.clear(keep_tail=True)    # everything inside is emitted
+
+    for offset in range(0, len(content), FEED_BYTES):
+        parser.feed(content[offset:offset + FEED_BYTES])
+        drain()
+        if size >= limit:
+            break
+    else:
+        try:
+            parser.close()
+        except etree.XMLSyntaxError:    # empty or whitespace-only document
+            pass
+        drain()
+    return ' '.join(parts)[:limit]
+
+
+def recipe_text(content, encoding=None):
+    """A schema.org Recipe in the page's JSON-LD as plain text, or None."""
+    for block in JSON_LD_RE.findall(content):
+        try:
+            data = json.loads(block.decode(encoding or 'utf-8', 'replace'))
+        except ValueError:
+            continue
+        recipe = _find_recipe(data)
+        if recipe:
+            return _format_recipe(recipe)
+    return None
+
+
+def _find_recipe(node):
+    if isinstance(node, list):
+        for item in node:
+            found = _find_recipe(item)
+            if found:
+                return found
+    elif isinstance(node, dict):
+        kind = node.get('@type')
+        if kind == 'Recipe' or (isinstance(kind, list) and 'Recipe' in kind):
+            return node
+        for key in ('@graph', 'mainEntity', 'itemListElement'):
+            if key in node:
+                found = _find_recipe(node[key])
+                if found:
+                    return found
+    return None
+
+
+def _format_recipe(r):
+    lines = []
+    if r.get('name'):
+        lines.append(f"Recipe: {_clean(r['name'])}.")
+    if r.get('description'):
+        lines.append(_clean(r['description']))
+    facts = []
+    yields = r.get('recipeYield')
+    if yields:
+        facts.append(f"Serves: {_clean(yields[0] if isinstance(yields, list) else yields)}")
+    for key, label in (('prepTime', 'Prep'), ('cookTime', 'Cook'), ('totalTime', 'Total')):
+        if r.get(key):
+            facts.append(f"{label}: {_duration(r[key])}")
+    if facts:
+        lines.append('. '.join(facts) + '.')
+    ingredients = [_clean(i) for i in _as_list(r.get('recipeIngredient'))]
+    if ingredients:
+        lines.append('Ingredients: ' + '; '.join(i for i in ingredients if i) + '.')
+    steps = _steps(r.get('recipeInstructions'))
+    if steps:
+        lines.append('Steps: ' + ' '.join(f"{n}. {s}" for n, s in enumerate(steps, 1)))
+    return ' '.join(lines) if len(lines) > 1 else None
+
+
+def _steps(node):
+    steps = []
+    for item in _as_list(node):
+        if isinstance(item, str):
+            steps.append(_clean(item))
+        elif isinstance(item, dict):
+            if 'itemListElement' in item:     # HowToSection
+                steps.extend(_steps(item['itemListElement']))
+            elif item.get('text') or item.get('name'):
+                steps.append(_clean(item.get('text') or item.get('name')))
+    return [s for s in steps if s]
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _clean(value):
+    text = str(value)
+    if '<' in text:
+        text = re.sub(r'<[^>]+>', ' ', text)
+    return WS_RE.sub(' ', text).strip()
+
+
+def _duration(value):
+    m = ISO_DURATION_RE.match(str(value))
+    if not m or not any(m.groups()):
+        return _clean(value)
+    days, hours, minutes = (int(g) if g else 0 for g in m.groups())
+    hours += days * 24
+    if hours and minutes:
+        return f"{hours} h {minutes} min"
+    return f"{hours} h" if hours else f"{minutes} min"
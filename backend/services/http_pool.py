@@ -0,0 +1,88 @@
+"""
+HTTP Pool — shared keep-alive sessions for outbound requests
+One requests.Session per profile; urllib3 keeps a connection pool per
+host inside each, so repeat hits on the same site skip TCP+TLS setup.
+"""
+import threading
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import Config
+
+USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+    'AppleWebKit/537.36 Chrome/120.0.0.0 Safari/537.36'
+)
+
+_sessions = {}
+_async_clients = {}
+_lock = threading.Lock()
+
+
+def _build(profile):
+    if profile == 'stream':
+        # Only retry failed connects; a half-read audio body can't be replayed.
+        retry = Retry(
+            total=Config.HTTP_RETRIES, connect=Config.HTTP_RETRIES,
+            read=0, status=0, backoff_factor=Config.HTTP_BACKOFF,
+        )
+    else:
+        retry = Retry(
+            total=Config.HTTP_RETRIES, backoff_factor=Config.HTTP_BACKOFF,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=('GET', 'HEAD'),
+            respect_retry_after_header=False,
+        )
+    adapter = HTTPAdapter(
+        pool_connections=Config.HTTP_POOL_HOSTS,
+        pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    s = requests.Session()
+    s.mount('http://', adapter)
+    s.mount('https://', adapter)
+    s.headers['User-Agent'] = USER_AGENT
+    return s
+
+
+def get_session(profile='scrape'):
+    """Shared session for a profile ('scrape' or 'stream')."""
+    s = _sessions.get(profile)
+    if s is None:
+        with _lock:
+            s = _sessions.get(profile)
+            if s is None:
+                s = _sessions[profile] = _build(profile)
+    return s
+
+
+def get_async_client(profile='scrape'):
+    """Shared httpx.AsyncClient for the async serving mode (one event loop)."""
+    c = _async_clients.get(profile)
+    if c is None:
+        c = _async_clients[profile] = httpx.AsyncClient(
+            headers={'User-Agent': USER_AGENT},
+            follow_redirects=True,
+            transport=httpx.AsyncHTTPTransport(
+                retries=Config.HTTP_RETRIES,
+                limits=httpx.Limits(
+                    max_connections=Config.HTTP_POOL_HOSTS * Config.HTTP_POOL_MAXSIZE,
+                    max_keepalive_connections=Config.HTTP_POOL_MAXSIZE,
+                ),
+            ),
+        )
+    return c
+
+
+async def aclose_all():
+    for c in list(_async_clients.values()):
+        await c.aclose()
+    _async_clients.clear()
+
+
+def close_all():
+    with _lock:
+        for s in _sessions.values():
+            s.close()
+        _sessions.clear()
@@ -0,0 +1,187 @@
+"""
+Intent Router — classifies chat messages in one pass
+The message is split into words once and walked through a word-level
+keyword automaton (first word -> phrases starting with it), collecting
+which signals are present as a bitmask. A priority-ordered rule table
+then picks the intent, and only the winner's slots (song, duration,
+ingredients) are pulled out with regexes.
+"""
+import re
+
+# signal name -> phrases that may appear anywhere in the message
+KEYWORDS = {
+    'radio': ['radio', 'station'],
+    'stop_music': ['stop music', 'stop playing'],
+    'unlike': ['unlike', 'remove from liked', 'dislike this'],
+    'like': ['like this', 'like song', 'love this', 'add to liked', 'save this song', 'favorite this'],
+    'timer': ['timer', 'timers', 'alarm', 'remind', 'reminder', 'countdown'],
+    'set': ['set', 'start', 'count', 'put'],
+    'recipe': ['recipe', 'recipes', 'cook with', 'make with'],
+    'advice': [
+        'how', 'what', 'why', 'when', 'too much',
+        'substitute', 'substitutes', 'substituting', 'substitution',
+    ],
+}
+
+# signal name -> words that count only as the first of several words
+FIRST_WORDS = {
+    'play': ['play'],
+    'question': ['how', 'what', 'why', 'when'],
+}
+
+# signal name -> whole messages
+EXACT = {
+    'skip': ['skip', 'next', 'next song'],
+}
+
+# A number followed by one of these ("10 min", "10min", "10-minute",
+# "1h30m") is a 'duration'.
+UNITS = {
+    'h', 'hr', 'hrs', 'hour', 'hours', 'm', 'min', 'mins', 'minute', 'minutes',
+    's', 'sec', 'secs', 'second', 'seconds',
+}
+
+WORD_RE = re.compile(r'[a-z0-9]+')
+DIGIT_RE = re.compile(r'\d')
+DURATION = r'\b\d+\s*-?\s*(?:' + '|'.join(sorted(UNITS, key=len, reverse=True)) + r')(?![a-z])'
+DURATION_RE = re.compile(DURATION, re.I)
+NUMBER_UNIT_RE = re.compile(r'(\d+)([a-z]+)')
+
+# Checked in priority order (lowest first); the first match wins.
+#   all:  every signal must be present
+#   any:  at least one must be present (if given)
+#   none: none may be present
+RULES = [
+    {'priority': 10, 'intent': 'play', 'all': ['play'], 'none': ['radio']},
+    {'priority': 20, 'intent': 'stop_music', 'all': ['stop_music']},
+    {'priority': 30, 'intent': 'skip', 'all': ['skip']},
+    {'priority': 40, 'intent': 'unlike', 'all': ['unlike']},
+    {'priority': 41, 'intent': 'like', 'all': ['like']},
+    # A timer with a duration is a request however the sentence starts
+    # ("when the water boils set a timer for 8 minutes").
+    {'priority': 49, 'intent': 'timer', 'all': ['timer', 'duration']},
+    # Without one, a question *about* timers ("how long is a timer") is not.
+    {'priority': 50, 'intent': 'timer', 'all': ['timer'], 'none': ['question']},
+    {'priority': 51, 'intent': 'timer', 'all': ['set', 'duration'], 'none': ['question']},
+    {'priority': 60, 'intent': 'recipe', 'all': ['recipe']},
+    {'priority': 70, 'intent': 'advice', 'all': ['advice']},
+]
+
+SLOTS = {
+    'play': {'song': re.compile(r'^play\W+(.+)$', re.I | re.S)},
+    'timer': {'duration': DURATION_RE},
+    'recipe': {'ingredients': re.compile(r'\b(?:with|using|from)\s+(.+)$', re.I | re.S)},
+}
+
+
+class Intent:
+    __slots__ = ('name', 'slots')
+
+    def __init__(self, name, slots=None):
+        self.name = name
+        self.slots = slots or {}
+
+    def __repr__(self):
+        return f"Intent({self.name!r}, {self.slots!r})"
+
+
+class IntentRouter:
+    def __init__(self, keywords=KEYWORDS, first_words=FIRST_WORDS, exact=EXACT,
+                 rules=RULES, slots=SLOTS):
+        names = list(keywords) + list(first_words) + list(exact) + ['duration']
+        self._bits = {name: 1 << i for i, name in enumerate(dict.fromkeys(names))}
+        self._duration = self._bits['duration']
+        # first word -> [(remaining words, bit)]
+        self._phrases = {}
+        for name, phrases in keywords.items():
+            for phrase in phrases:
+                words = phrase.split()
+                self._phrases.setdefault(words[0], []).append((words[1:], self._bits[name]))
+        self._first = self._index(first_words)
+        self._exact = self._index(exact)
+        self._rules = [
+            (
+                rule['intent'],
+                self._mask(rule.get('all')),
+                self._mask(rule.get('any')),
+                self._mask(rule.get('none')),
+            )
+            for rule in sorted(rules, key=lambda r: r['priority'])
+        ]
+        self._slots = slots
+        self._decisions = {}    # signal bitmask -> intent, filled lazily
+
+    def classify(self, message):
+        text = message.strip()
+        found = self.signals(text.lower())
+        intent = self._decisions.get(found)
+        if intent is None:
+            intent = self._decisions[found] = self._decide(found)
+        if intent in self._slots:
+            return Intent(intent, self._extract(intent, text))
+        return Intent(intent)
+
+    def signals(self, msg):
+        """Bitmask of the signals present in a lower-cased message."""
+        words = WORD_RE.findall(msg)
+        if not words:
+            return 0
+        found = self._exact.get(' '.join(words), 0)
+        if len(words) > 1:
+            found |= self._first.get(words[0], 0)
+        phrases = self._phrases
+        # Most words are not keywords; intersect first, then walk hits.
+        for w in phrases.keys() & set(words):
+            for rest, bit in phrases[w]:
+                if not rest:
+                    found |= bit
+                elif any(words[i + 1:i + 1 + len(rest)] == rest
+                         for i, x in enumerate(words) if x == w):
+                    found |= bit
+        if DIGIT_RE.search(msg):
+            found |= self._durations(words)
+        return found
+
+    # ------------------------------------------
+    # Internal helpers
+    # ------------------------------------------
+
+    def _durations(self, words):
+        last = len(words) - 1
+        for i, w in enumerate(words):
+            if w.isdigit():
+                if i < last and words[i + 1] in UNITS:
+                    return self._duration
+            elif w[0].isdigit():
+                pairs = NUMBER_UNIT_RE.findall(w)
+                if (all(unit in UNITS for _, unit in pairs)
+                        and sum(len(n) + len(unit) for n, unit in pairs) == len(w)):
+                    return self._duration
+        return 0
+
+    def _decide(self, found):
+        for intent, all_, any_, none in self._rules:
+            if found & all_ == all_ and (not any_ or found & any_) and not found & none:
+                return intent
+        return 'general'
+
+    def _index(self, table):
+        index = {}
+        for name, entries in table.items():
+            for entry in entries:
+                index[entry] = index.get(entry, 0) | self._bits[name]
+        return index
+
+    def _mask(self, names):
+        mask = 0
+        for name in names or ():
+            mask |= self._bits[name]
+        return mask
+
+    def _extract(self, intent, text):
+        slots = {}
+        for name, pattern in self._slots.get(intent, {}).items():
+            m = pattern.search(text)
+            if m:
+                slots[name] = (m.group(1) if m.groups() else m.group(0)).strip()
+        return slots
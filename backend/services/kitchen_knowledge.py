@@ -0,0 +1,310 @@
+"""
+Kitchen Knowledge — offline answers for common kitchen questions
+Unit conversions (with ingredient densities for cups <-> grams), oven
+temperatures and gas marks, safe internal temperatures and ingredient
+substitutions are answered from local tables. Anything it can't answer
+confidently returns None and goes to the web/LLM path as before.
+"""
+import re
+
+# ------------------------------------------
+# Tables
+# ------------------------------------------
+
+VOLUME_ML = {
+    'tsp': 4.929, 'tbsp': 14.787, 'cup': 236.588, 'fl oz': 29.574,
+    'pint': 473.176, 'quart': 946.353, 'gallon': 3785.41, 'ml': 1.0, 'l': 1000.0,
+}
+WEIGHT_G = {'g': 1.0, 'kg': 1000.0, 'oz': 28.3495, 'lb': 453.592}
+
+UNIT_ALIASES = {
+    'tsp': ['teaspoons', 'teaspoon', 'tsps', 'tsp'],
+    'tbsp': ['tablespoons', 'tablespoon', 'tbsps', 'tbsp', 'tbs', 'tbl'],
+    'cup': ['cups', 'cup'],
+    'fl oz': ['fluid ounces', 'fluid ounce', 'fl oz', 'fl. oz'],
+    'pint': ['pints', 'pint', 'pt'],
+    'quart': ['quarts', 'quart', 'qt'],
+    'gallon': ['gallons', 'gallon', 'gal'],
+    'ml': ['millilitres', 'milliliters', 'millilitre', 'milliliter', 'ml'],
+    'l': ['litres', 'liters', 'litre', 'liter', 'l'],
+    'g': ['grams', 'gram', 'gr', 'g'],
+    'kg': ['kilograms', 'kilogram', 'kilos', 'kilo', 'kg'],
+    'oz': ['ounces', 'ounce', 'oz'],
+    'lb': ['pounds', 'pound', 'lbs', 'lb'],
+}
+
+# grams per US cup
+DENSITY = {
+    'all-purpose flour': (125, ['all purpose flour', 'all-purpose flour', 'plain flour', 'flour']),
+    'bread flour': (127, ['bread flour']),
+    'cake flour': (114, ['cake flour']),
+    'whole wheat flour': (120, ['whole wheat flour', 'wholemeal flour']),
+    'granulated sugar': (200, ['granulated sugar', 'white sugar', 'caster sugar', 'sugar']),
+    'brown sugar': (220, ['brown sugar']),
+    'powdered sugar': (120, ['powdered sugar', 'icing sugar', 'confectioners sugar']),
+    'butter': (227, ['butter']),
+    'water': (236, ['water']),
+    'milk': (245, ['milk']),
+    'heavy cream': (238, ['heavy cream', 'double cream', 'cream']),
+    'yogurt': (245, ['yogurt', 'yoghurt']),
+    'vegetable oil': (218, ['vegetable oil', 'olive oil', 'oil']),
+    'honey': (340, ['honey']),
+    'maple syrup': (322, ['maple syrup']),
+    'cocoa powder': (85, ['cocoa powder', 'cocoa']),
+    'rolled oats': (90, ['rolled oats', 'oats']),
+    'white rice': (185, ['white rice', 'rice']),
+    'table salt': (288, ['table salt', 'salt']),
+    'cornstarch': (128, ['cornstarch', 'cornflour', 'corn starch']),
+    'baking soda': (230, ['baking soda', 'bicarbonate of soda']),
+    'baking powder': (192, ['baking powder']),
+    'chocolate chips': (170, ['chocolate chips']),
+    'grated parmesan': (100, ['parmesan']),
+    'shredded cheese': (113, ['shredded cheese', 'cheddar', 'cheese']),
+    'peanut butter': (258, ['peanut butter']),
+    'chopped nuts': (120, ['chopped nuts', 'walnuts', 'pecans', 'nuts']),
+    'almonds': (143, ['almonds']),
+}
+
+GAS_MARKS = {1: 275, 2: 300, 3: 325, 4: 350, 5: 375, 6: 400, 7: 425, 8: 450, 9: 475}
+
+OVEN_TERMS = [
+    ('very hot', 450, 475), ('moderately hot', 375, 400), ('very slow', 250, 275),
+    ('hot', 400, 425), ('moderate', 350, 375), ('slow', 300, 325), ('cool', 250, 275),
+]
+
+# internal temperatures, °F
+DONENESS = {
+    'poultry': (['chicken', 'turkey', 'duck', 'poultry'], "165°F (74°C)"),
+    'ground meat': (['ground beef', 'ground pork', 'mince', 'burger', 'burgers', 'meatloaf'], "160°F (71°C)"),
+    'pork': (['pork', 'pork chop', 'pork chops', 'tenderloin'], "145°F (63°C), then rest 3 minutes"),
+    'beef': (['beef', 'steak', 'roast beef', 'lamb'],
+             "rare 125°F (52°C), medium-rare 135°F (57°C), medium 145°F (63°C), "
+             "well done 160°F (71°C); 145°F with a 3 minute rest is the safe minimum"),
+    'fish': (['fish', 'salmon', 'cod', 'tuna', 'tilapia'], "145°F (63°C), or until it flakes easily"),
+    'egg dishes': (['egg', 'eggs', 'quiche', 'casserole'], "160°F (71°C)"),
+    'ham': (['ham'], "140°F (60°C) for precooked ham, 145°F (63°C) for fresh"),
+    'leftovers': (['leftovers', 'leftover'], "165°F (74°C)"),
+}
+
+SUBSTITUTES = {
+    'buttermilk': (['buttermilk'], "1 cup milk + 1 tbsp lemon juice or white vinegar; let it stand 5 minutes."),
+    'egg': (['eggs', 'egg'], "per egg: 1 tbsp ground flaxseed + 3 tbsp water (rest 5 min), or 1/4 cup applesauce or mashed banana in baking."),
+    'butter': (['butter'], "use 3/4 the amount of vegetable oil, or the same amount of margarine or coconut oil."),
+    'oil': (['vegetable oil', 'oil'], "the same amount of melted butter, or applesauce for up to half of it in baking."),
+    'baking powder': (['baking powder'], "per tsp: 1/4 tsp baking soda + 1/2 tsp cream of tartar."),
+    'baking soda': (['baking soda'], "3 tsp baking powder per 1 tsp baking soda (and cut salt slightly)."),
+    'brown sugar': (['brown sugar'], "1 cup white sugar + 1 tbsp molasses."),
+    'powdered sugar': (['powdered sugar', 'icing sugar'], "blend 1 cup granulated sugar with 1 tbsp cornstarch until fine."),
+    'sour cream': (['sour cream'], "the same amount of plain Greek yogurt."),
+    'heavy cream': (['heavy cream', 'double cream'], "3/4 cup milk + 1/4 cup melted butter per cup (not for whipping)."),
+    'cake flour': (['cake flour'], "1 cup all-purpose flour minus 2 tbsp, plus 2 tbsp cornstarch, sifted."),
+    'self-rising flour': (['self rising flour', 'self-rising flour', 'self raising flour', 'self-raising flour'],
+                          "1 cup all-purpose flour + 1 1/2 tsp baking powder + 1/4 tsp salt."),
+    'cornstarch': (['cornstarch', 'cornflour', 'corn starch'], "2 tbsp all-purpose flour per 1 tbsp cornstarch for thickening."),
+    'milk': (['milk'], "equal parts water and evaporated milk, or any unsweetened plant milk 1:1."),
+    'wine': (['white wine', 'red wine', 'wine'], "the same amount of stock plus a splash of vinegar or lemon juice."),
+    'lemon juice': (['lemon juice'], "the same amount of lime juice or half as much white vinegar."),
+    'garlic': (['garlic clove', 'garlic'], "1/8 tsp garlic powder per clove."),
+    'fresh herbs': (['fresh herbs'], "1 tsp dried herbs per 1 tbsp fresh."),
+    'honey': (['honey'], "the same amount of maple syrup, or 1 1/4 cups sugar + 1/4 cup liquid per cup."),
+}
+
+# ------------------------------------------
+# Patterns
+# ------------------------------------------
+
+def _alternation(words):
+    return '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+def _alias_index(table, pick):
+    index = {}
+    for key, value in table.items():
+        for alias in pick(value):
+            index[alias] = key
+    return index
+
+
+_UNIT_INDEX = _alias_index(UNIT_ALIASES, lambda v: v)
+_DENSITY_INDEX = _alias_index(DENSITY, lambda v: v[1])
+_DONENESS_INDEX = _alias_index(DONENESS, lambda v: v[0])
+_SUBSTITUTE_INDEX = _alias_index(SUBSTITUTES, lambda v: v[0])
+
+AMOUNT = r'(?P<amt>\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?|an?|one|half(?: an?)?)'
+UNIT_RE = re.compile(rf'(?:\b{AMOUNT}\s*)?(?<![a-z])(?P<unit>{_alternation(_UNIT_INDEX)})\b')
+HOW_MANY_RE = re.compile(r'\bhow (?:many|much)\s+')
+INGREDIENT_RE = re.compile(rf'\b(?:{_alternation(_DENSITY_INDEX)})\b')
+DONENESS_RE = re.compile(rf'\b(?:{_alternation(_DONENESS_INDEX)})\b')
+
+TEMP_RE = re.compile(r'(-?\d+(?:\.\d+)?)\s*°?\s*(fahrenheit|celsius|centigrade|f|c)\b')
+TEMP_TARGET_RE = re.compile(r'\b(?:to|in|into)\s+(?:degrees\s+)?(?:fahrenheit|celsius|centigrade|f|c)\b')
+GAS_RE = re.compile(r'\bgas mark (\d)\b')
+OVEN_RE = re.compile(rf"\b({'|'.join(t[0] for t in OVEN_TERMS)}) oven\b")
+CONVERT_CUE = re.compile(r'\bconvert\b')
+# What may sit between the two amounts of a conversion: "2 cups (of flour) in grams".
+CONVERT_GAP = re.compile(
+    rf"\s*(?:(?:of\s+)?(?:{_alternation(_DENSITY_INDEX)})\s+)?"
+    r"(?:(?:is|are|equals?|makes?|=)\s*)?(?:(?:to|in|into)\s+)?"
+)
+# "how long until it's done" asks for a time, not a temperature.
+DURATION_ASK = re.compile(r'\b(?:how long|how many (?:minutes|hours)|how much time|what time)\b')
+DONENESS_CUE = re.compile(
+    r'\b(?:done|doneness|(?:internal|safe)\s+temp(?:erature)?|cooked\s+(?:to|through)|'
+    r'medium[- ]rare|well[- ]done)\b'
+)
+# An explicit ask is required: "fry an egg without oil" wants a method, not
+# an oil replacement.
+SUBSTITUTE_CUE = re.compile(
+    r"\b(?:substitutes?|substitution|replace|replacement|instead of|swap|alternatives?)\b"
+)
+# "buttermilk substitute", "substitute the butter"
+SUBSTITUTE_NEAR = re.compile(
+    rf"\b(?P<item>{_alternation(_SUBSTITUTE_INDEX)})\s+(?:substitutes?|substitution|replacement|alternative)\b"
+    rf"|\b(?:substitute|replace|swap)\s+(?:the\s+)?(?P<item2>{_alternation(_SUBSTITUTE_INDEX)})\b"
+)
+SUBSTITUTE_TARGET = re.compile(
+    rf"\b(?:for|instead of|alternatives? to|replace|out of|don'?t have|do not have)\s+(?:any\s+|the\s+|a\s+)?"
+    rf"(?P<item>{_alternation(_SUBSTITUTE_INDEX)})\b"
+)
+
+
+class KitchenKnowledge:
+    def answer(self, message):
+        """Local answer for a kitchen fact question, or None."""
+        msg = message.lower().strip()
+        return (
+            self.substitution(msg) or self.doneness(msg)
+            or self.temperature(msg) or self.conversion(msg)
+        )
+
+    # ------------------------------------------
+    # Lookups
+    # ------------------------------------------
+
+    def conversion(self, msg):
+        # Only explicit asks: "convert ...", "how many g in a cup", "2 cups
+        # to g". Two amounts in one sentence alone ("is 2 tbsp of salt too
+        # much for 1 l of water") are not a conversion.
+        units = list(UNIT_RE.finditer(msg))
+        if len(units) < 2:
+            return None
+        if not CONVERT_CUE.search(msg):
+            gap = msg[units[0].end():units[1].start()]
+            if not gap.strip() or not CONVERT_GAP.fullmatch(gap):
+                return None
+        # "how many g in a cup" names the target first; "2 cups to g" the source.
+        how = HOW_MANY_RE.search(msg)
+        if how and units[0].start() == how.end():
+            target, source = units[0], units[1]
+        else:
+            source, target = units[0], units[1]
+        src = _UNIT_INDEX[source.group('unit')]
+        dst = _UNIT_INDEX[target.group('unit')]
+        if src == dst:
+            return None
+        amount = self._amount(source.group('amt'))
+        ingredient = INGREDIENT_RE.search(msg)
+        name = _DENSITY_INDEX[ingredient.group(0)] if ingredient else None
+
+        grams_per_ml = DENSITY[name][0] / VOLUME_ML['cup'] if name else None
+        if src in VOLUME_ML and dst in VOLUME_ML:
+            value = amount * VOLUME_ML[src] / VOLUME_ML[dst]
+        elif src in WEIGHT_G and dst in WEIGHT_G:
+            value = amount * WEIGHT_G[src] / WEIGHT_G[dst]
+        elif grams_per_ml is None:
+            return None     # volume <-> weight needs to know what it is
+        elif src in VOLUME_ML:
+            value = amount * VOLUME_ML[src] * grams_per_ml / WEIGHT_G[dst]
+        else:
+            value = amount * WEIGHT_G[src] / grams_per_ml / VOLUME_ML[dst]
+
+        of = f" of {name}" if name else ''
+        return f"{_fmt(amount)} {_unit(src, amount)}{of} is about {_fmt(value)} {_unit(dst, value)}."
+
+    def temperature(self, msg):
+        m = GAS_RE.search(msg)
+        if m and int(m.group(1)) in GAS_MARKS:
+            f = GAS_MARKS[int(m.group(1))]
+            return f"Gas mark {m.group(1)} is about {f}°F ({_f_to_c(f)}°C)."
+        m = OVEN_RE.search(msg)
+        if m:
+            for term, lo, hi in OVEN_TERMS:
+                if term == m.group(1):
+                    return (f"A {term} oven is about {lo}-{hi}°F "
+                            f"({_f_to_c(lo)}-{_f_to_c(hi)}°C).")
+        m = TEMP_RE.search(msg)
+        if not m or not TEMP_TARGET_RE.search(msg, m.end()):
+            return None
+        value = float(m.group(1))
+        if m.group(2).startswith('f'):
+            c = _f_to_c(value)
+            text = f"{_fmt(value)}°F is about {c}°C"
+            f = value
+        else:
+            f = round(value * 9 / 5 + 32)
+            text = f"{_fmt(value)}°C is about {f}°F"
+        mark = min(GAS_MARKS, key=lambda g: abs(GAS_MARKS[g] - f))
+        if abs(GAS_MARKS[mark] - f) <= 12:
+            text += f" (gas mark {mark})"
+        return text + '.'
+
+    def doneness(self, msg):
+        if not DONENESS_CUE.search(msg) or TEMP_RE.search(msg) or DURATION_ASK.search(msg):
+            return None
+        m = DONENESS_RE.search(msg)
+        if not m:
+            return None
+        kind = _DONENESS_INDEX[m.group(0)]
+        return f"Cook {m.group(0)} to an internal temperature of {DONENESS[kind][1]}."
+
+    def substitution(self, msg):
+        if not SUBSTITUTE_CUE.search(msg):
+            return None
+        # The missing ingredient must be named next to the ask; "best oil
+        # for frying, is olive oil a good substitute" is left to the LLM.
+        m = SUBSTITUTE_TARGET.search(msg)
+        if m:
+            item = m.group('item')
+        else:
+            m = SUBSTITUTE_NEAR.search(msg)
+            if not m:
+                return None
+            item = m.group('item') or m.group('item2')
+        key = _SUBSTITUTE_INDEX[item]
+        return f"Instead of {key}: {SUBSTITUTES[key][1]}"
+
+    # ------------------------------------------
+    # Internal helpers
+    # ------------------------------------------
+
+    @staticmethod
+    def _amount(text):
+        if not text or text in ('a', 'an', 'one'):
+            return 1.0
+        if text.startswith('half'):
+            return 0.5
+        total = 0.0
+        for part in text.split():
+            if '/' in part:
+                n, d = part.split('/')
+                total += int(n) / int(d) if int(d) else 0
+            else:
+                total += float(part)
+        return total
+
+
+def _f_to_c(f):
+    return round((f - 32) * 5 / 9)
+
+
+def _fmt(x):
+    if x >= 100:
+        return str(round(x))
+    if x >= 10:
+        return f"{x:.1f}".rstrip('0').rstrip('.')
+    return f"{x:.2f}".rstrip('0').rstrip('.')
+
+
+def _unit(unit, amount):
+    plural = {'cup': 'cups', 'pint': 'pints', 'quart': 'quarts', 'gallon': 'gallons'}
+    return plural.get(unit, unit) if amount != 1 else unit
@@ -0,0 +1,176 @@
+"""
+Metrics — span timings as Prometheus histograms, plus counters
+Work under measurement is wrapped in span() / upstream() (context
+managers) or @timed; each records its wall time into a fixed-bucket
+histogram keyed by its label values. Recording is a bisect and two adds
+under a per-histogram lock, so it is cheap enough for every request.
+render() writes the Prometheus text format served at /metrics.
+"""
+import time
+import asyncio
+import functools
+import threading
+from bisect import bisect_left
+
+# Seconds; upper bounds of the histogram buckets (+Inf is implicit).
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REGISTRY = []
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}    # label values -> [count per bucket..., +Inf count, sum]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, seconds, *values):
+        i = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += seconds
+
+    def collect(self):
+        """[(label values, cumulative bucket counts, count, sum)]"""
+        with self._lock:
+            snapshot = [(values, list(s)) for values, s in self._series.items()]
+        out = []
+        for values, series in sorted(snapshot):
+            cumulative, total = [], 0
+            for n in series[:-1]:
+                total += n
+                cumulative.append(total)
+            out.append((values, cumulative, total, series[-1]))
+        return out
+
+    def samples(self):
+        bounds = [_number(b) for b in self.buckets] + ['+Inf']
+        for values, cumulative, count, total in self.collect():
+            labels = _labels(self.labels, values)
+            sep = ',' if labels else ''
+            for le, n in zip(bounds, cumulative):
+                yield f'{self.name}_bucket{{{labels}{sep}le="{le}"}} {n}'
+            suffix = f'{{{labels}}}' if labels else ''
+            yield f"{self.name}_sum{suffix} {total!r}"
+            yield f"{self.name}_count{suffix} {count}"
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *values, amount=1):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        for values, n in snapshot:
+            labels = _labels(self.labels, values)
+            yield f"{self.name}{{{labels}}} {n}" if labels else f"{self.name} {n}"
+
+
+class _Span:
+    __slots__ = ('histogram', 'values', 'outcome', 'started')
+
+    def __init__(self, histogram, values, outcome=False):
+        self.histogram = histogram
+        self.values = values
+        self.outcome = outcome
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        values = self.values
+        if self.outcome:
+            values += ('error' if exc_type else 'ok',)
+        self.histogram.observe(time.perf_counter() - self.started, *values)
+        return False
+
+
+REQUESTS = Histogram(
+    'kitchen_request_seconds', 'Chat messages from receipt to reply, by intent',
+    ('intent',),
+)
+SPANS = Histogram(
+    'kitchen_span_seconds', 'Time spent in service operations',
+    ('span',),
+)
+UPSTREAMS = Histogram(
+    'kitchen_upstream_seconds', 'Calls to external services, by outcome',
+    ('upstream', 'outcome'),
+)
+COALESCED = Counter(
+    'kitchen_singleflight_calls_total',
+    'Calls through single-flight groups; followers shared a leader\'s result',
+    ('flight', 'role'),
+)
+
+
+def span(name):
+    """Time a block as an internal operation: `with span('search.context'):`"""
+    return _Span(SPANS, (name,))
+
+
+def upstream(name):
+    """Time a call to an external service; an exception counts as an error."""
+    return _Span(UPSTREAMS, (name,), outcome=True)
+
+
+def timed(name):
+    """Decorator form of span() for plain and async functions."""
+    def wrap(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def run_async(*args, **kwargs):
+                with _Span(SPANS, (name,)):
+                    return await fn(*args, **kwargs)
+            return run_async
+
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            with _Span(SPANS, (name,)):
+                return fn(*args, **kwargs)
+        return run
+    return wrap
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+
+def _labels(names, values):
+    return ','.join(f'{k}="{_escape(v)}"' for k, v in zip(names, values))
+
+
+def _number(value):
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
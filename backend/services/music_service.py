@@ -3,7 +3,20 @@ Music Service — Direct song playback via yt-dlp
 Extracts m4a audio URLs (Safari compatible)
 """
 import time
-import yt_dlp
+import queue
+import itertools
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qs
+from config import Config
+from .ydl_pool import YDLPool
+from .cache import TieredCache
+from .prefetcher import TrackPrefetcher
+from .audio_cache import AudioCache
+from .stream_engine import StreamEngine
+from .metrics import upstream, timed
+from .single_flight import SingleFlight
+from .circuit_breaker import CircuitOpen, get_breaker
 
 
 class MusicService:
@@ -22,99 +35,122 @@ class MusicService:
         },
     }
 
+    # yt-dlp option profiles; one pool of instances per profile
+    YDL_PROFILES = {
+        'search': {
+            'format': 'bestaudio[ext=m4a]/bestaudio/best',
+            'noplaylist': True,
+            'quiet': True,
+            'no_warnings': True,
+            'socket_timeout': Config.UPSTREAM_TIMEOUTS['youtube'][2],
+            'extract_flat': False,
+        },
+        'search_flat': {
+            'noplaylist': True,
+            'quiet': True,
+            'no_warnings': True,
+            'socket_timeout': Config.UPSTREAM_TIMEOUTS['youtube'][2],
+            'extract_flat': 'in_playlist',
+        },
+        'video': {
+            'format': 'bestaudio[ext=m4a]/bestaudio/best',
+            'quiet': True,
+            'no_warnings': True,
+            'socket_timeout': Config.UPSTREAM_TIMEOUTS['youtube'][2],
+        },
+    }
+
+    # Background resolve priorities (lower runs first)
+    PRIORITY_NEXT = 0        # next track in the queue
+    PRIORITY_QUEUED = 1      # + queue position
+    PRIORITY_SEARCH = 100    # + rank in search results
+
     def __init__(self):
         self.current_track = None
         self.is_playing = False
         self.queue = []
-        self._url_cache = {}
+        self._url_cache = TieredCache(
+            path=Config.URL_CACHE_PATH if Config.URL_CACHE_PERSIST else None,
+            memory_bytes=Config.URL_CACHE_BYTES,
+            disk_bytes=Config.URL_CACHE_BYTES * 4,
+        )
+        self._url_cache.start_purging(Config.CACHE_PURGE_INTERVAL)
+        self._resolve_queue = queue.PriorityQueue()
+        self._resolve_pending = {}   # video_id -> best queued priority
+        self._resolve_lock = threading.Lock()
+        self._resolve_seq = itertools.count()
+        self._search_flight = SingleFlight('music.search')
+        self._audio_flight = SingleFlight('music.audio_url')
+        self._breaker = get_breaker('youtube')
+        self._recent_tracks = OrderedDict()    # video_id -> track, answers searches while YouTube is down
+        self._recent_lock = threading.Lock()
+        self._ydl_pool = YDLPool(
+            self.YDL_PROFILES,
+            size=Config.YDL_POOL_SIZE,
+            max_uses=Config.YDL_MAX_USES,
+        )
+        threading.Thread(target=self._ydl_pool.warm_up, name='ydl-warmup', daemon=True).start()
+        self.stream_engine = StreamEngine()
+        self.audio_cache = AudioCache(engine=self.stream_engine)
+        self.prefetcher = TrackPrefetcher(self)
+        for i in range(Config.MUSIC_RESOLVE_WORKERS):
+            threading.Thread(
+                target=self._resolve_worker, name=f'yt-resolve-{i}', daemon=True
+            ).start()
         print("✅ Music Service initialized (yt-dlp)")
 
     # ------------------------------------------
     # Search & extract
     # ------------------------------------------
 
-    def search_songs(self, query, max_results=5):
-        """Search YouTube, return tracks with direct audio URLs."""
-        try:
-            print(f"🎵 Searching: {query}")
-            ydl_opts = {
-                'format': 'bestaudio[ext=m4a]/bestaudio/best',
-                'noplaylist': True,
-                'quiet': True,
-                'no_warnings': True,
-                'default_search': f'ytsearch{max_results}',
-                'extract_flat': False,
-            }
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                data = ydl.extract_info(
-                    f"ytsearch{max_results}:{query}", download=False
-                )
-
-            tracks = []
-            if data and 'entries' in data:
-                for entry in data['entries']:
-                    if entry is None:
-                        continue
-                    audio_url = self._best_audio_url(entry)
-                    if audio_url:
-                        vid = entry.get('id', '')
-                        track = {
-                            'title': entry.get('title', 'Unknown'),
-                            'artist': entry.get('uploader', 'Unknown'),
-                            'duration': entry.get('duration', 0),
-                            'duration_str': self._fmt(entry.get('duration', 0)),
-                            'thumbnail': entry.get('thumbnail', ''),
-                            'audio_url': audio_url,
-                            'video_id': vid,
-                        }
-                        tracks.append(track)
-                        self._url_cache[vid] = {
-                            'audio_url': audio_url,
-                            'title': track['title'],
-                            'expires': time.time() + 18000,
-                        }
-            print(f"✅ Found {len(tracks)} tracks")
-            return tracks
-        except Exception as e:
-            print(f"❌ Search error: {e}")
-            return []
+    @timed('music.search')
+    def search_songs(self, query, max_results=5, flat=False):
+        """
+        Search YouTube.
+        flat=False resolves direct audio URLs for every result (slow).
+        flat=True returns titles/ids straight from the search page and
+        resolves audio URLs in the background, best-ranked first.
+        """
+        key = (' '.join(query.lower().split()), max_results, flat)
+        return self._search_flight.do(key, self._search, query, max_results, flat)
 
+    @timed('music.audio_url')
     def get_audio_url(self, video_id):
         """Get (possibly cached) audio URL for a video ID."""
-        if video_id in self._url_cache:
-            c = self._url_cache[video_id]
-            if time.time() < c['expires']:
-                return {'status': 'success', **c}
+        c = self._url_cache.get('url', video_id)
+        if c:
+            return {'status': 'success', **c}
 
         try:
-            ydl_opts = {
-                'format': 'bestaudio[ext=m4a]/bestaudio/best',
-                'quiet': True,
-                'no_warnings': True,
-            }
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(
-                    f"https://www.youtube.com/watch?v={video_id}",
-                    download=False,
-                )
-            audio_url = self._best_audio_url(info)
-            if audio_url:
-                self._url_cache[video_id] = {
-                    'audio_url': audio_url,
-                    'title': info.get('title', ''),
-                    'expires': time.time() + 18000,
-                }
-                return {
-                    'status': 'success',
-                    'audio_url': audio_url,
-                    'title': info.get('title', ''),
-                    'duration': info.get('duration', 0),
-                }
-            return {'status': 'error', 'message': 'No audio found'}
+            return self._audio_flight.do(video_id, self._resolve, video_id)
         except Exception as e:
             print(f"❌ Audio URL error: {e}")
             return {'status': 'error', 'message': str(e)}
 
+    def cached_audio(self, video_id):
+        """Cache entry ({'audio_url', 'title', 'expires'}) or None; never resolves."""
+        return self._url_cache.get('url', video_id)
+
+    def refresh_audio_url(self, video_id):
+        """Resolve a fresh URL, bypassing the cache. The cached entry is
+        replaced only on success, so a failed lookup keeps a working URL."""
+        try:
+            return self._audio_flight.do(video_id, self._resolve, video_id)
+        except Exception as e:
+            print(f"❌ Audio URL refresh error: {e}")
+            return {'status': 'error', 'message': str(e)}
+
+    def prioritize(self, video_id, priority):
+        """Queue a background URL resolve; a lower priority jumps ahead."""
+        if not video_id or self._cached_url(video_id):
+            return
+        with self._resolve_lock:
+            current = self._resolve_pending.get(video_id)
+            if current is not None and current <= priority:
+                return
+            self._resolve_pending[video_id] = priority
+        self._resolve_queue.put((priority, next(self._resolve_seq), video_id))
+
     # ------------------------------------------
     # Playback helpers
     # ------------------------------------------
@@ -124,13 +160,15 @@ class MusicService:
         if tracks:
             self.current_track = tracks[0]
             self.is_playing = True
+            self.prefetcher.kick()
             return {'status': 'playing', 'track': tracks[0]}
         return {'status': 'error', 'message': f'Nothing found for: {query}'}
 
     def add_to_queue(self, query):
-        tracks = self.search_songs(query, max_results=1)
+        tracks = self.search_songs(query, max_results=1, flat=True)
         if tracks:
             self.queue.append(tracks[0])
+            self._prioritize_queue()
             return {
                 'status': 'queued',
                 'track': tracks[0],
@@ -142,6 +180,7 @@ class MusicService:
         if self.queue:
             self.current_track = self.queue.pop(0)
             self.is_playing = True
+            self._prioritize_queue()
             return {'status': 'playing', 'track': self.current_track}
         self.current_track = None
         self.is_playing = False
@@ -181,10 +220,189 @@ class MusicService:
             'queue_length': len(self.queue),
         }
 
+    def get_stats(self):
+        return {
+            'ydl_pool': self._ydl_pool.stats(),
+            'url_cache': self._url_cache.stats(),
+            'prefetch': self.prefetcher.stats(),
+            'audio_cache': self.audio_cache.stats(),
+            'streams': self.stream_engine.stats(),
+            'coalescing': {
+                'search': self._search_flight.stats(),
+                'audio_url': self._audio_flight.stats(),
+            },
+            'resolve_pending': len(self._resolve_pending),
+            'recent_tracks': len(self._recent_tracks),
+        }
+
     # ------------------------------------------
     # Internal helpers
     # ------------------------------------------
 
+    def _prioritize_queue(self):
+        for pos, track in enumerate(self.queue):
+            priority = self.PRIORITY_NEXT if pos == 0 else self.PRIORITY_QUEUED + pos
+            self.prioritize(track.get('video_id'), priority)
+        self.prefetcher.kick()
+
+    def _resolve_worker(self):
+        while True:
+            priority, _, video_id = self._resolve_queue.get()
+            with self._resolve_lock:
+                if self._resolve_pending.get(video_id) != priority:
+                    continue    # superseded by a higher-priority entry
+                del self._resolve_pending[video_id]
+            if self._cached_url(video_id):
+                continue
+            try:
+                self._audio_flight.do(video_id, self._resolve, video_id)
+            except CircuitOpen:
+                pass    # resolved on demand once YouTube is back
+            except Exception as e:
+                print(f"❌ Background resolve error ({video_id}): {e}")
+
+    def _search(self, query, max_results, flat):
+        try:
+            print(f"🎵 Searching: {query}")
+            data = self._extract(
+                'search_flat' if flat else 'search', 'youtube_search',
+                f"ytsearch{max_results}:{query}",
+            )
+
+            tracks = []
+            if data and 'entries' in data:
+                for entry in data['entries']:
+                    if entry is None or not entry.get('id'):
+                        continue
+                    vid = entry['id']
+                    if flat:
+                        cached = self._cached_url(vid)
+                        tracks.append(self._track(entry, cached))
+                        if not cached:
+                            self.prioritize(vid, self.PRIORITY_SEARCH + len(tracks))
+                        continue
+                    audio_url = self._best_audio_url(entry)
+                    if audio_url:
+                        tracks.append(self._track(entry, audio_url))
+                        self._store_url(vid, audio_url, entry.get('title', 'Unknown'))
+            print(f"✅ Found {len(tracks)} tracks{' (flat)' if flat else ''}")
+            self._remember_tracks(tracks)
+            return tracks
+        except CircuitOpen as e:
+            tracks = self._recent_matches(query, max_results, flat)
+            print(f"🔌 YouTube search skipped ({e}); {len(tracks)} recent tracks match")
+            return tracks
+        except Exception as e:
+            print(f"❌ Search error: {e}")
+            return []
+
+    def _resolve(self, video_id):
+        """yt-dlp lookup + URL cache store; callers go through _audio_flight."""
+        info = self._extract_video(video_id)
+        audio_url = self._best_audio_url(info)
+        if audio_url:
+            self._store_url(video_id, audio_url, info.get('title', ''))
+            return {
+                'status': 'success',
+                'audio_url': audio_url,
+                'title': info.get('title', ''),
+                'duration': info.get('duration', 0),
+            }
+        return {'status': 'error', 'message': 'No audio found'}
+
+    def _extract_video(self, video_id):
+        return self._extract(
+            'video', 'youtube_video', f"https://www.youtube.com/watch?v={video_id}"
+        )
+
+    def _extract(self, profile, span_name, url):
+        """
+        extract_info() under the YouTube breaker. yt-dlp fixes its socket
+        timeout when an instance is built, so the adaptive timeout is
+        applied as the breaker's slow-call threshold instead; the
+        profiles' socket_timeout is the hard ceiling.
+        """
+        self._breaker.acquire()
+        try:
+            with self._ydl_pool.acquire(profile) as ydl, upstream(span_name):
+                started = time.perf_counter()
+                info = ydl.extract_info(url, download=False)
+        except Exception:
+            self._breaker.record(False)
+            raise
+        except BaseException:
+            self._breaker.release()
+            raise
+        self._breaker.record(True, time.perf_counter() - started)
+        return info
+
+    def _remember_tracks(self, tracks):
+        with self._recent_lock:
+            for t in tracks:
+                self._recent_tracks[t['video_id']] = {**t, 'audio_url': None}
+                self._recent_tracks.move_to_end(t['video_id'])
+            while len(self._recent_tracks) > Config.RECENT_TRACKS:
+                self._recent_tracks.popitem(last=False)
+
+    def _recent_matches(self, query, max_results, flat):
+        """Recently found tracks sharing words with the query, best
+        overlap first. Without flat only tracks with a cached URL count."""
+        words = set(query.lower().split())
+        with self._recent_lock:
+            recent = list(self._recent_tracks.values())
+        scored = []
+        for i, t in enumerate(reversed(recent)):    # newest first on ties
+            overlap = len(words & set(f"{t['title']} {t['artist']}".lower().split()))
+            if overlap:
+                scored.append((-overlap, i, t))
+        tracks = []
+        for _, _, t in sorted(scored, key=lambda x: x[:2]):
+            audio_url = self._cached_url(t['video_id'])
+            if audio_url or flat:
+                tracks.append({**t, 'audio_url': audio_url})
+            if len(tracks) >= max_results:
+                break
+        return tracks
+
+    def _cached_url(self, video_id):
+        c = self._url_cache.get('url', video_id)
+        return c['audio_url'] if c else None
+
+    def _store_url(self, video_id, audio_url, title):
+        expires = self._url_expiry(audio_url)
+        ttl = expires - time.time() - Config.URL_EXPIRY_MARGIN
+        if ttl <= 0:
+            return
+        self._url_cache.set('url', video_id, {
+            'audio_url': audio_url,
+            'title': title,
+            'expires': expires,
+        }, ttl=ttl)
+
+    @staticmethod
+    def _url_expiry(audio_url):
+        """googlevideo URLs carry their own expiry as ?expire=<unix time>."""
+        try:
+            qs = parse_qs(urlparse(audio_url).query)
+            return float(qs['expire'][0])
+        except (KeyError, IndexError, ValueError):
+            return time.time() + Config.URL_CACHE_DEFAULT_TTL
+
+    def _track(self, entry, audio_url):
+        vid = entry.get('id', '')
+        thumb = entry.get('thumbnail')
+        if not thumb and entry.get('thumbnails'):
+            thumb = entry['thumbnails'][-1].get('url')
+        return {
+            'title': entry.get('title', 'Unknown'),
+            'artist': entry.get('uploader') or entry.get('channel') or 'Unknown',
+            'duration': entry.get('duration') or 0,
+            'duration_str': self._fmt(entry.get('duration', 0)),
+            'thumbnail': thumb or f"https://i.ytimg.com/vi/{vid}/hqdefault.jpg",
+            'audio_url': audio_url,
+            'video_id': vid,
+        }
+
     @staticmethod
     def _best_audio_url(entry):
         if not entry:
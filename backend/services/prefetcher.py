@@ -0,0 +1,68 @@
+"""
+Track Prefetcher — keeps upcoming tracks ready to play
+For the current track and the next few in the queue, a background
+thread keeps the audio URL fresh and makes sure the first few hundred
+KB are in the audio cache, so a skip can start playing without waiting
+on yt-dlp or the upstream connection.
+"""
+import time
+import threading
+from config import Config
+
+
+class TrackPrefetcher:
+    def __init__(self, music):
+        self.music = music
+        self._warmed = 0
+        self._wake = threading.Event()
+        threading.Thread(target=self._loop, name='prefetcher', daemon=True).start()
+
+    def kick(self):
+        """Re-check targets now (queue or current track changed)."""
+        self._wake.set()
+
+    def stats(self):
+        return {'warmed': self._warmed}
+
+    # ------------------------------------------
+    # Internal helpers
+    # ------------------------------------------
+
+    def _targets(self):
+        tracks = [self.music.current_track] + list(self.music.queue[:Config.PREFETCH_AHEAD])
+        ids = []
+        for t in tracks:
+            vid = (t or {}).get('video_id')
+            if vid and vid not in ids:
+                ids.append(vid)
+        return ids
+
+    def _loop(self):
+        while True:
+            self._wake.wait(Config.PREFETCH_INTERVAL)
+            self._wake.clear()
+            for vid in self._targets():
+                try:
+                    self._prepare(vid)
+                except Exception as e:
+                    print(f"❌ Prefetch error ({vid}): {e}")
+
+    def _prepare(self, video_id):
+        if self.music.audio_cache.complete_path(video_id):
+            return
+        cached = self.music.cached_audio(video_id)
+        if not cached or cached['expires'] - time.time() < Config.PREFETCH_REFRESH_WINDOW:
+            result = self.music.refresh_audio_url(video_id)
+            if result.get('status') == 'success':
+                audio_url = result['audio_url']
+            elif cached and cached['expires'] > time.time():
+                audio_url = cached['audio_url']    # refresh failed; still usable
+            else:
+                return
+        else:
+            audio_url = cached['audio_url']
+        cache = self.music.audio_cache
+        if not cache.covers(video_id, 0, Config.PREFETCH_BYTES - 1):
+            cache.warm(video_id, audio_url, Config.PREFETCH_BYTES)
+            self._warmed += 1
+            print(f"⚡ Prefetched {Config.PREFETCH_BYTES // 1024}KB of {video_id}")
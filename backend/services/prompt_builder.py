@@ -0,0 +1,123 @@
+"""
+Prompt Builder — token-budgeted prompt assembly
+Scraped pages are cut into short passages, ranked against the question
+with BM25, and only the best ones that fit the budget go to the model.
+History is trimmed oldest-first if the whole prompt is still too big.
+"""
+import re
+import math
+from collections import Counter
+from config import Config
+
+STOP_WORDS = {
+    'a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'with',
+    'is', 'are', 'was', 'be', 'it', 'this', 'that', 'you', 'your', 'i',
+    'my', 'do', 'does', 'can', 'how', 'what', 'why', 'when', 'at', 'by',
+    'as', 'from', 'if', 'so', 'but', 'not', 'me', 'we', 'should',
+}
+SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+WORD_RE = re.compile(r'[a-z0-9]+')
+MESSAGE_OVERHEAD = 4   # role/format tokens per chat message
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 chars per token for English)."""
+    return len(text) // 4 + 1
+
+
+def tokenize(text):
+    return [w for w in WORD_RE.findall(text.lower()) if w not in STOP_WORDS]
+
+
+class PromptBuilder:
+    def __init__(self, budget=None, context_budget=None, passage_sentences=None):
+        self.budget = budget or Config.PROMPT_TOKEN_BUDGET
+        self.context_budget = context_budget or Config.CONTEXT_TOKEN_BUDGET
+        self.passage_sentences = passage_sentences or Config.PASSAGE_SENTENCES
+
+    def build(self, system, history, message, web_context=None):
+        """Return the chat messages list for one completion call."""
+        content = message
+        if web_context:
+            info = self.select_context(message, web_context)
+            if info:
+                content = (
+                    f"Info:\n{info}\n\n"
+                    f"Question: {message}\n\n"
+                    "Answer in 1-2 sentences."
+                )
+
+        used = self._cost(system) + self._cost(content)
+        kept = []
+        for msg in reversed(history):
+            cost = self._cost(msg['content'])
+            if used + cost > self.budget:
+                break
+            kept.append(msg)
+            used += cost
+        kept.reverse()
+
+        return (
+            [{"role": "system", "content": system}]
+            + kept
+            + [{"role": "user", "content": content}]
+        )
+
+    def select_context(self, question, web_context):
+        """Top-ranked passages that fit the context budget, in page order."""
+        passages = self.split_passages(web_context)
+        if not passages:
+            return ''
+        if sum(estimate_tokens(p) for p in passages) <= self.context_budget:
+            return '\n'.join(passages)
+
+        scores = self.bm25(tokenize(question), passages)
+        ranked = sorted(range(len(passages)), key=lambda i: scores[i], reverse=True)
+        chosen, used = [], 0
+        for i in ranked:
+            if scores[i] <= 0 and chosen:
+                break
+            cost = estimate_tokens(passages[i])
+            if used + cost > self.context_budget:
+                continue
+            chosen.append(i)
+            used += cost
+        return '\n'.join(passages[i] for i in sorted(chosen))
+
+    def split_passages(self, text):
+        passages, seen = [], set()
+        for block in text.split('\n\n'):
+            sentences = [s.strip() for s in SENTENCE_RE.split(block) if s.strip()]
+            for i in range(0, len(sentences), self.passage_sentences):
+                p = ' '.join(sentences[i:i + self.passage_sentences])[:800]
+                key = p.lower()
+                if key not in seen:
+                    seen.add(key)
+                    passages.append(p)
+        return passages
+
+    @staticmethod
+    def bm25(query_terms, passages, k1=1.5, b=0.75):
+        docs = [tokenize(p) for p in passages]
+        n = len(docs)
+        avg_len = (sum(len(d) for d in docs) / n) or 1
+        df = Counter()
+        for d in docs:
+            df.update(set(d))
+        terms = set(query_terms)
+        scores = []
+        for d in docs:
+            tf = Counter(d)
+            score = 0.0
+            for t in terms:
+                if t not in tf:
+                    continue
+                idf = math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5))
+                f = tf[t]
+                score += idf * f * (k1 + 1) / (f + k1 * (1 - b + b * len(d) / avg_len))
+            scores.append(score)
+        return scores
+
+    @staticmethod
+    def _cost(text):
+        return estimate_tokens(text) + MESSAGE_OVERHEAD
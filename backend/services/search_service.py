@@ -1,61 +1,212 @@
 """
 Search Service — Google Search + Scraping
 """
-import requests
-from bs4 import BeautifulSoup
+import re
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
 from config import Config
+from .cache import TieredCache
+from .http_pool import get_session, get_async_client
+from .html_extract import extract_text
+from .metrics import span, upstream, timed
+from .single_flight import SingleFlight
+from .circuit_breaker import CircuitOpen, get_breaker
+
+FILLER_WORDS = {
+    'a', 'an', 'the', 'to', 'do', 'i', 'you', 'my', 'please', 'can',
+    'should', 'is', 'are', 'of', 'for', 'me',
+}
+
+
+def normalize_query(query):
+    """Lowercase, strip punctuation and filler words so near-identical
+    questions share a cache key."""
+    words = re.findall(r'[a-z0-9]+', query.lower())
+    kept = [w for w in words if w not in FILLER_WORDS]
+    return ' '.join(kept or words)
 
 
 class SearchService:
     def __init__(self):
+        self.cache = TieredCache(
+            path=Config.CACHE_DB_PATH,
+            memory_bytes=Config.CACHE_MEMORY_BYTES,
+            disk_bytes=Config.CACHE_DISK_BYTES,
+            ttls={
+                'search': Config.SEARCH_CACHE_TTL,
+                'page': Config.PAGE_CACHE_TTL,
+            },
+        )
+        self.cache.start_purging(Config.CACHE_PURGE_INTERVAL)
+        self._pool = ThreadPoolExecutor(
+            max_workers=Config.SCRAPE_WORKERS, thread_name_prefix='scrape'
+        )
+        self.context_flight = SingleFlight('search.context')
+        self.breaker = get_breaker('google')
         print("✅ Search Service initialized")
 
     def search_web(self, query, num_results=None):
         if num_results is None:
             num_results = Config.MAX_SEARCH_RESULTS
+        key = f"{num_results}:{normalize_query(query)}"
+        cached = self.cache.get('search', key)
+        if cached is not None:
+            print(f"⚡ Search cache hit: {query}")
+            return cached
         try:
             print(f"🔍 Searching: {query}")
-            from googlesearch import search
-            urls = []
-            for url in search(query, num_results=num_results, lang='en'):
-                urls.append(url)
-                if len(urls) >= num_results:
-                    break
+            urls = self.breaker.call(self._google, query, num_results, self.breaker.timeout())
             print(f"✅ Found {len(urls)} results")
+            if urls:
+                self.cache.set('search', key, urls)
             return urls
+        except CircuitOpen as e:
+            # Callers answer without web context instead of waiting.
+            print(f"🔌 Search skipped: {e}")
+            return []
         except Exception as e:
             print(f"❌ Search error: {e}")
             return []
 
     def scrape_content(self, url):
+        cached = self.cache.get('page', url)
+        if cached is not None:
+            return cached
         try:
-            headers = {
-                'User-Agent': (
-                    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-                    'AppleWebKit/537.36 Chrome/120.0.0.0 Safari/537.36'
-                )
-            }
-            r = requests.get(url, headers=headers, timeout=Config.SCRAPE_TIMEOUT)
-            soup = BeautifulSoup(r.content, 'html.parser')
-            for el in soup(['script', 'style', 'nav', 'footer', 'header', 'aside', 'iframe']):
-                el.decompose()
-            text = soup.get_text(separator=' ', strip=True)
-            lines = [l.strip() for l in text.split('\n') if l.strip()]
-            cleaned = ' '.join(lines)
-            while '  ' in cleaned:
-                cleaned = cleaned.replace('  ', ' ')
-            return cleaned[:Config.MAX_SCRAPE_CHARS]
+            with upstream('scrape'):
+                r = get_session('scrape').get(url, timeout=Config.SCRAPE_TIMEOUT)
+            cleaned = self._extract_text(r.content, r.headers.get('Content-Type'))
+            if cleaned:
+                self.cache.set('page', url, cleaned)
+            return cleaned
         except Exception as e:
             print(f"❌ Scrape error: {e}")
             return None
 
+    @timed('search.scrape_many')
+    def scrape_many(self, urls, deadline=None, want=None):
+        """
+        Scrape URLs in parallel on the shared worker pool.
+        Returns contents in search-rank order, stopping once `want`
+        pages came back non-empty or `deadline` seconds have passed.
+        """
+        if deadline is None:
+            deadline = Config.SCRAPE_DEADLINE
+        if want is None:
+            want = Config.SCRAPE_GOOD_RESULTS
+        started = time.time()
+        futures = {self._pool.submit(self.scrape_content, u): i for i, u in enumerate(urls)}
+        results = {}
+        try:
+            for fut in as_completed(futures, timeout=deadline):
+                content = fut.result()
+                if content:
+                    results[futures[fut]] = content
+                    if len(results) >= want:
+                        break
+        except FuturesTimeout:
+            print(f"⏱️ Scrape deadline hit ({deadline}s), using {len(results)} pages")
+        finally:
+            # Pages still queued are no longer needed; running ones finish
+            # on their own within SCRAPE_TIMEOUT.
+            for fut in futures:
+                fut.cancel()
+        print(f"✅ Scraped {len(results)}/{len(urls)} pages in {time.time() - started:.2f}s")
+        return [results[i] for i in sorted(results)]
+
+    @timed('search.context')
     def get_context(self, query, num_results=None):
+        """Web context for a query; overlapping identical queries share one fetch."""
+        key = (normalize_query(query), num_results)
+        return self.context_flight.do(key, self._build_context, query, num_results)
+
+    # ------------------------------------------
+    # Async variants (ASGI serving mode)
+    # ------------------------------------------
+
+    async def scrape_content_async(self, url):
+        cached = self.cache.get('page', url)
+        if cached is not None:
+            return cached
+        try:
+            with upstream('scrape'):
+                r = await get_async_client('scrape').get(url, timeout=Config.SCRAPE_TIMEOUT)
+            cleaned = await asyncio.to_thread(
+                self._extract_text, r.content, r.headers.get('Content-Type')
+            )
+            if cleaned:
+                self.cache.set('page', url, cleaned)
+            return cleaned
+        except Exception as e:
+            print(f"❌ Scrape error: {e}")
+            return None
+
+    @timed('search.scrape_many')
+    async def scrape_many_async(self, urls, deadline=None, want=None):
+        """Async scrape_many(): same deadline and first-N cutoff, no threads held."""
+        if deadline is None:
+            deadline = Config.SCRAPE_DEADLINE
+        if want is None:
+            want = Config.SCRAPE_GOOD_RESULTS
+        loop = asyncio.get_running_loop()
+        stop_at = loop.time() + deadline
+        tasks = {asyncio.create_task(self.scrape_content_async(u)): i for i, u in enumerate(urls)}
+        pending = set(tasks)
+        results = {}
+        try:
+            while pending and len(results) < want:
+                remaining = stop_at - loop.time()
+                if remaining <= 0:
+                    print(f"⏱️ Scrape deadline hit ({deadline}s), using {len(results)} pages")
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for t in done:
+                    content = t.result()
+                    if content:
+                        results[tasks[t]] = content
+        finally:
+            for t in pending:
+                t.cancel()
+        return [results[i] for i in sorted(results)[:want]]
+
+    @timed('search.context')
+    async def get_context_async(self, query, num_results=None):
+        key = (normalize_query(query), num_results)
+        return await self.context_flight.do_async(key, self._build_context_async, query, num_results)
+
+    # ------------------------------------------
+    # Internal helpers
+    # ------------------------------------------
+
+    def _google(self, query, num_results, timeout):
+        from googlesearch import search
+        urls = []
+        with upstream('google'):
+            for url in search(query, num_results=num_results, lang='en', timeout=timeout):
+                urls.append(url)
+                if len(urls) >= num_results:
+                    break
+        return urls
+
+    @staticmethod
+    def _extract_text(content, content_type=None):
+        with span('search.extract'):
+            return extract_text(content, Config.MAX_SCRAPE_CHARS, content_type)
+
+    def _build_context(self, query, num_results):
         urls = self.search_web(query, num_results)
         if not urls:
             return None
-        contexts = []
-        for url in urls:
-            content = self.scrape_content(url)
-            if content:
-                contexts.append(content)
-        return '\n\n'.join(contexts) if contexts else None
\ No newline at end of file
+        contexts = self.scrape_many(urls)
+        return '\n\n'.join(contexts) if contexts else None
+
+    async def _build_context_async(self, query, num_results):
+        # googlesearch is a blocking library; keep it off the event loop.
+        urls = await asyncio.to_thread(self.search_web, query, num_results)
+        if not urls:
+            return None
+        contexts = await self.scrape_many_async(urls)
+        return '\n\n'.join(contexts) if contexts else None
@@ -0,0 +1,106 @@
+"""
+Session Store — per-client conversation history
+Each session keeps a fixed-size ring of (role, content) turns; idle
+sessions expire and the least recently used go first when the store
+is over its session or memory cap.
+"""
+import time
+import threading
+from collections import OrderedDict, deque
+
+
+class Session:
+    __slots__ = ('turns', 'size', 'last_seen')
+
+    def __init__(self, max_messages):
+        self.turns = deque(maxlen=max_messages)
+        self.size = 0
+        self.last_seen = time.time()
+
+
+class SessionStore:
+    def __init__(self, max_messages=10, idle_ttl=3600, max_sessions=1000,
+                 max_bytes=16_000_000, max_message_chars=2000):
+        self.max_messages = max_messages
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.max_message_chars = max_message_chars
+        self._sessions = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._last_purge = time.time()
+
+    def history(self, session_id):
+        """Snapshot of a session's turns as chat messages, oldest first."""
+        with self._lock:
+            s = self._sessions.get(session_id)
+            if s is None or self._expired(s, time.time()):
+                return []
+            return [{'role': r, 'content': c} for r, c in s.turns]
+
+    def append(self, session_id, role, content):
+        content = content[:self.max_message_chars]
+        now = time.time()
+        with self._lock:
+            s = self._sessions.get(session_id)
+            if s is None or self._expired(s, now):
+                self._drop(session_id)
+                s = self._sessions[session_id] = Session(self.max_messages)
+            self._sessions.move_to_end(session_id)
+            if len(s.turns) == s.turns.maxlen:
+                self._resize(s, -len(s.turns[0][1]))
+            s.turns.append((role, content))
+            self._resize(s, len(content))
+            s.last_seen = now
+            self._enforce_caps(now)
+
+    def clear(self, session_id):
+        with self._lock:
+            self._drop(session_id)
+
+    def purge(self):
+        """Remove idle sessions. Returns how many were dropped."""
+        now = time.time()
+        with self._lock:
+            return self._purge(now)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'bytes': self._size,
+                'max_sessions': self.max_sessions,
+                'max_bytes': self.max_bytes,
+            }
+
+    # ------------------------------------------
+    # Internal helpers (call with lock held)
+    # ------------------------------------------
+
+    def _expired(self, s, now):
+        return now - s.last_seen > self.idle_ttl
+
+    def _resize(self, s, delta):
+        s.size += delta
+        self._size += delta
+
+    def _drop(self, session_id):
+        s = self._sessions.pop(session_id, None)
+        if s:
+            self._size -= s.size
+
+    def _purge(self, now):
+        self._last_purge = now
+        dead = [sid for sid, s in self._sessions.items() if self._expired(s, now)]
+        for sid in dead:
+            self._drop(sid)
+        return len(dead)
+
+    def _enforce_caps(self, now):
+        if now - self._last_purge > 60:
+            self._purge(now)
+        while self._sessions and (
+            len(self._sessions) > self.max_sessions or self._size > self.max_bytes
+        ):
+            self._drop(next(iter(self._sessions)))
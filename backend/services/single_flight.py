@@ -0,0 +1,90 @@
+"""
+Single Flight — one in-flight computation per key
+When identical calls overlap (several tablets asking for the same song
+or recipe at once), the first caller runs the work and the rest wait
+for its result instead of repeating it. Nothing is cached: once the
+call finishes the key is free again. Results are shared between the
+callers, so treat them as read-only.
+"""
+import asyncio
+import threading
+from .metrics import COALESCED
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}     # key -> _Call (threads)
+        self._tasks = {}     # key -> asyncio.Task (event loop)
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'executions': 0, 'coalesced': 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        """fn(*args, **kwargs), shared with any call for `key` already running."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._count(leader)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """Async do(): fn is a coroutine function. A caller that is
+        cancelled leaves the shared task running for the others."""
+        with self._lock:
+            task = self._tasks.get(key)
+            leader = task is None
+            if leader:
+                task = self._tasks[key] = asyncio.ensure_future(fn(*args, **kwargs))
+                task.add_done_callback(lambda t: self._finished(key, t))
+            self._count(leader)
+        return await asyncio.shield(task)
+
+    def stats(self):
+        with self._lock:
+            calls = self._stats['calls']
+            return {
+                **self._stats,
+                'in_flight': len(self._calls) + len(self._tasks),
+                'coalesced_rate': round(self._stats['coalesced'] / calls, 3) if calls else 0.0,
+            }
+
+    # ------------------------------------------
+    # Internal helpers
+    # ------------------------------------------
+
+    def _count(self, leader):
+        self._stats['calls'] += 1
+        self._stats['executions' if leader else 'coalesced'] += 1
+        COALESCED.inc(self.name, 'leader' if leader else 'follower')
+
+    def _finished(self, key, task):
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        if not task.cancelled():
+            task.exception()    # retrieved here if every caller went away
@@ -0,0 +1,163 @@
+"""
+Stream Engine — upstream reads and per-stream metrics for the audio proxy
+Upstream bodies are read in adaptive chunks: small at first for a fast
+first byte, growing while the upstream keeps up and shrinking when a
+read is slow. An optional reader thread keeps a bounded read-ahead
+buffer so upstream reads overlap client writes; a full buffer pauses
+the reader, which gives backpressure from slow clients.
+"""
+import time
+import queue
+import itertools
+import threading
+from collections import deque
+from config import Config
+
+_DONE = object()
+
+
+class _StreamStats:
+    __slots__ = ('id', 'label', 'started', 'ended', 'bytes', 'state')
+
+    def __init__(self, sid, label):
+        self.id = sid
+        self.label = label
+        self.started = time.time()
+        self.ended = None
+        self.bytes = 0
+        self.state = 'active'
+
+    def as_dict(self):
+        elapsed = (self.ended or time.time()) - self.started
+        return {
+            'id': self.id,
+            'label': self.label,
+            'state': self.state,
+            'bytes': self.bytes,
+            'seconds': round(elapsed, 2),
+            'kbps': round(self.bytes * 8 / 1000 / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+class StreamEngine:
+    def __init__(self, min_chunk=None, max_chunk=None, readahead=None, target_read_seconds=None):
+        self.min_chunk = min_chunk or Config.STREAM_CHUNK_MIN
+        self.max_chunk = max_chunk or Config.STREAM_CHUNK_MAX
+        self.readahead = Config.STREAM_READAHEAD_CHUNKS if readahead is None else readahead
+        self.target = target_read_seconds or Config.STREAM_TARGET_READ_SECONDS
+        self._ids = itertools.count(1)
+        self._active = {}
+        self._recent = deque(maxlen=50)
+        self._lock = threading.Lock()
+        self._totals = {
+            'streams': 0, 'aborted': 0, 'bytes_out': 0,
+            'upstream_bytes': 0, 'upstream_reads': 0,
+        }
+
+    # ------------------------------------------
+    # Upstream side
+    # ------------------------------------------
+
+    def read(self, r):
+        """Iterate an upstream requests response (stream=True) in adaptive
+        chunks. Closing the iterator releases the upstream connection."""
+        if self.readahead > 0:
+            return self._read_ahead(r)
+        return self._read_direct(r)
+
+    def _chunks(self, r, stopped=lambda: False):
+        size = self.min_chunk
+        while not stopped():
+            t = time.monotonic()
+            data = r.raw.read(size, decode_content=True)
+            if not data:
+                return
+            took = time.monotonic() - t
+            with self._lock:
+                self._totals['upstream_bytes'] += len(data)
+                self._totals['upstream_reads'] += 1
+            yield data
+            if len(data) == size and took < self.target / 2:
+                size = min(size * 2, self.max_chunk)
+            elif took > self.target:
+                size = max(size // 2, self.min_chunk)
+
+    def _read_direct(self, r):
+        try:
+            yield from self._chunks(r)
+        finally:
+            r.close()
+
+    def _read_ahead(self, r):
+        buf = queue.Queue(maxsize=self.readahead)
+        stop = threading.Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    buf.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def reader():
+            try:
+                for data in self._chunks(r, stop.is_set):
+                    if not put(data):
+                        return
+                put(_DONE)
+            except Exception as e:
+                put(e)
+
+        threading.Thread(target=reader, name='stream-reader', daemon=True).start()
+        try:
+            while True:
+                item = buf.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            r.close()
+
+    # ------------------------------------------
+    # Client side
+    # ------------------------------------------
+
+    def track(self, body, label=''):
+        """Wrap a response body to record per-stream throughput."""
+        st = _StreamStats(next(self._ids), label)
+        with self._lock:
+            self._active[st.id] = st
+            self._totals['streams'] += 1
+        try:
+            for data in body:
+                st.bytes += len(data)
+                yield data
+            st.state = 'done'
+        finally:
+            if st.state == 'active':
+                st.state = 'aborted'    # client went away mid-stream
+            close = getattr(body, 'close', None)
+            if close:
+                close()
+            st.ended = time.time()
+            with self._lock:
+                self._active.pop(st.id, None)
+                self._recent.append(st)
+                self._totals['bytes_out'] += st.bytes
+                if st.state == 'aborted':
+                    self._totals['aborted'] += 1
+
+    def stats(self):
+        with self._lock:
+            reads = self._totals['upstream_reads']
+            return {
+                **self._totals,
+                'avg_read_bytes': self._totals['upstream_bytes'] // reads if reads else 0,
+                'active': [s.as_dict() for s in self._active.values()],
+                'recent': [s.as_dict() for s in reversed(self._recent)],
+            }
@@ -0,0 +1,122 @@
+"""
+Timer Journal — append-only log that lets timers survive a restart
+Set/cancel/expire records are queued by the caller and written by one
+background thread, which fsyncs once per batch (group commit) so a
+request never waits on the disk. When the log grows well past the
+number of live timers it is rewritten as one record per live timer,
+headed by the highest timer id issued so far so ids are never reused.
+"""
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+from .metrics import SPANS
+
+
+class TimerJournal:
+    def __init__(self, path, compact_after=1000):
+        self.path = path
+        self.compact_after = compact_after
+        self._queue = queue.Queue()
+        self._records = 0
+        self._live = None
+        self._file = None
+        self.last_id = 0     # highest timer id ever written
+        self._stats = {'writes': 0, 'commits': 0, 'compactions': 0}
+
+    def replay(self):
+        """Read the log and return the live timers as {id: record}."""
+        live = {}
+        if not os.path.exists(self.path):
+            return live
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break   # torn write at the tail
+                self._records += 1
+                if rec['op'] == 'ids':
+                    self.last_id = max(self.last_id, rec['last'])
+                    continue
+                self.last_id = max(self.last_id, rec['id'])
+                if rec['op'] == 'set':
+                    live[rec['id']] = rec
+                else:
+                    live.pop(rec['id'], None)
+        return live
+
+    def start(self, live):
+        """Begin writing. `live()` returns set records for the current
+        timers and is used for compaction."""
+        self._live = live
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._compact()
+        threading.Thread(target=self._writer, name='timer-journal', daemon=True).start()
+        atexit.register(self.flush)
+
+    def append(self, record):
+        """Queue a record; it is written and fsynced in the next batch."""
+        self.last_id = max(self.last_id, record['id'])
+        self._queue.put(record)
+
+    def flush(self, timeout=2.0):
+        """Wait until everything queued so far is on disk."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def stats(self):
+        return {**self._stats, 'records': self._records, 'pending': self._queue.qsize()}
+
+    # ------------------------------------------
+    # Internal helpers
+    # ------------------------------------------
+
+    def _writer(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            waiters = [b for b in batch if isinstance(b, threading.Event)]
+            records = [b for b in batch if not isinstance(b, threading.Event)]
+            try:
+                if records:
+                    started = time.perf_counter()
+                    self._file.write(''.join(json.dumps(r) + '\n' for r in records))
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                    SPANS.observe(time.perf_counter() - started, 'timer.journal_commit')
+                    self._records += len(records)
+                    self._stats['writes'] += len(records)
+                    self._stats['commits'] += 1
+                    if self._records > self.compact_after:
+                        self._compact()
+            except Exception as e:
+                print(f"❌ Timer journal error: {e}")
+            for w in waiters:
+                w.set()
+
+    def _compact(self):
+        # Replay is idempotent, so records still queued behind this
+        # snapshot can be appended to the new file safely.
+        live = self._live()
+        if self._file is not None and self._records <= 2 * len(live):
+            return
+        records = [{'op': 'ids', 'last': self.last_id}] + live
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(''.join(json.dumps(r) + '\n' for r in records))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, 'a')
+        self._records = len(records)
+        self._stats['compactions'] += 1
@@ -1,15 +1,49 @@
 """
 Timer Service — Kitchen Timers
+Deadlines sit in a min-heap watched by one scheduler thread, which
+expires timers as they come due and drops them from the active list.
+Set, cancel and expiry are pushed to subscribers (the SSE channel) so
+clients don't have to poll. Active timers are indexed by ID and by
+label, so lookups and cancels don't scan. With a journal configured,
+timers are restored with their remaining time after a restart.
 """
 import re
 import time
+import heapq
+import queue
+import itertools
 import threading
+from config import Config
+from .timer_journal import TimerJournal
+from .metrics import SPANS, timed
+
+
+class Timer:
+    __slots__ = ('id', 'label', 'seconds', 'start_time', 'end_time', 'active')
+
+    def __init__(self, timer_id, label, seconds, start_time):
+        self.id = timer_id
+        self.label = label
+        self.seconds = seconds
+        self.start_time = start_time
+        self.end_time = start_time + seconds
+        self.active = True
 
 
 class TimerService:
-    def __init__(self):
-        self.timers = []
-        self._lock = threading.Lock()
+    def __init__(self, journal_path=None):
+        self.timers = {}             # id -> Timer (active only)
+        self._by_label = {}          # label -> set of ids
+        self._heap = []              # (end_time, id); cancelled ids are skipped
+        self._dead = 0               # heap entries left behind by cancels
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._subscribers = set()
+        self._journal = None
+        path = journal_path or Config.TIMER_JOURNAL_PATH
+        if path:
+            self._restore(path)
+        threading.Thread(target=self._run, name='timer-scheduler', daemon=True).start()
         print("✅ Timer Service initialized")
 
     def parse_duration(self, text):
@@ -41,40 +75,155 @@ class TimerService:
             return ' '.join(parts), total
         return None, 0
 
+    @timed('timer.set')
     def set_timer(self, label, seconds):
-        timer_data = {
-            'id': len(self.timers) + 1,
-            'label': label,
-            'seconds': seconds,
-            'start_time': time.time(),
-            'end_time': time.time() + seconds,
-            'active': True,
-        }
-        with self._lock:
-            self.timers.append(timer_data)
+        now = time.time()
+        with self._cond:
+            t = Timer(next(self._ids), label, seconds, now)
+            self.timers[t.id] = t
+            self._by_label.setdefault(label, set()).add(t.id)
+            heapq.heappush(self._heap, (t.end_time, t.id))
+            self._record('set', t)
+            self._publish('set', t, now)
+            self._cond.notify()
         return f"Timer set for {label}"
 
     def get_active_timers(self):
         now = time.time()
-        active = []
-        with self._lock:
-            for t in self.timers:
-                if t['active']:
-                    remaining = max(0, t['end_time'] - now)
-                    if remaining <= 0:
-                        t['active'] = False
-                    active.append({
-                        'id': t['id'],
-                        'label': t['label'],
-                        'remaining': int(remaining),
-                        'active': t['active'],
-                    })
-        return active
+        with self._cond:
+            return [self._public(t, now) for t in self.timers.values()]
 
+    @timed('timer.cancel')
     def cancel_timer(self, timer_id):
-        with self._lock:
-            for t in self.timers:
-                if t['id'] == timer_id:
-                    t['active'] = False
-                    return True
-        return False
\ No newline at end of file
+        with self._cond:
+            return self._cancel(timer_id, time.time())
+
+    @timed('timer.cancel')
+    def cancel_label(self, label):
+        """Cancel every active timer with this label. Returns how many."""
+        now = time.time()
+        with self._cond:
+            ids = list(self._by_label.get(label, ()))
+            return sum(self._cancel(tid, now) for tid in ids)
+
+    @timed('timer.cancel')
+    def cancel_all(self):
+        now = time.time()
+        with self._cond:
+            return sum(self._cancel(tid, now) for tid in list(self.timers))
+
+    def subscribe(self, q=None):
+        """Register for timer events. Returns (queue, snapshot of active
+        timers); events arrive on the queue as (event, timer) tuples.
+        `q` can be any object with a non-blocking put()."""
+        q = q if q is not None else queue.Queue()
+        with self._cond:
+            self._subscribers.add(q)
+            now = time.time()
+            return q, [self._public(t, now) for t in self.timers.values()]
+
+    def unsubscribe(self, q):
+        with self._cond:
+            self._subscribers.discard(q)
+
+    # ------------------------------------------
+    # Internal helpers
+    # ------------------------------------------
+
+    def _run(self):
+        with self._cond:
+            while True:
+                now = time.time()
+                while self._heap and self._heap[0][0] <= now:
+                    _, tid = heapq.heappop(self._heap)
+                    t = self._remove(tid)
+                    if t is None:
+                        self._dead -= 1     # cancelled earlier
+                        continue
+                    self._record('expire', t)
+                    self._publish('expired', t, now)
+                    SPANS.observe(now - t.end_time, 'timer.expiry_lag')
+                timeout = self._heap[0][0] - now if self._heap else None
+                self._cond.wait(timeout)
+
+    def _cancel(self, timer_id, now):
+        t = self._remove(timer_id)
+        if t is None:
+            return False
+        self._record('cancel', t)
+        self._publish('cancel', t, now)
+        self._dead += 1
+        if self._dead > 64 and self._dead > len(self._heap) // 2:
+            self._heap = [(t.end_time, t.id) for t in self.timers.values()]
+            heapq.heapify(self._heap)
+            self._dead = 0
+        return True
+
+    def _remove(self, timer_id):
+        t = self.timers.pop(timer_id, None)
+        if t is None:
+            return None
+        t.active = False
+        ids = self._by_label.get(t.label)
+        ids.discard(timer_id)
+        if not ids:
+            del self._by_label[t.label]
+        return t
+
+    def _restore(self, path):
+        try:
+            journal = TimerJournal(path, compact_after=Config.TIMER_JOURNAL_COMPACT)
+            records = journal.replay()
+        except Exception as e:
+            print(f"❌ Timer journal error: {e} (timers not persisted)")
+            return
+        now = time.time()
+        for rec in records.values():
+            t = Timer(rec['id'], rec['label'], rec['seconds'], rec['start'])
+            # Timers that ran out while we were down still ring, shortly
+            # after startup so reconnecting clients get the event.
+            t.end_time = max(rec['end'], now + Config.TIMER_OVERDUE_GRACE)
+            self.timers[t.id] = t
+            self._by_label.setdefault(t.label, set()).add(t.id)
+            self._heap.append((t.end_time, t.id))
+        heapq.heapify(self._heap)
+        # Ids continue past every timer ever issued, including expired ones
+        # compacted away, so clients never mistake a new timer for an old one.
+        self._ids = itertools.count(max(journal.last_id, max(records, default=0)) + 1)
+        journal.start(self._live_records)
+        self._journal = journal
+        if records:
+            print(f"✅ Restored {len(records)} timers")
+
+    def _live_records(self):
+        with self._cond:
+            return [self._set_record(t) for t in self.timers.values()]
+
+    def _record(self, op, t):
+        if self._journal is None:
+            return
+        self._journal.append(self._set_record(t) if op == 'set' else {'op': op, 'id': t.id})
+
+    @staticmethod
+    def _set_record(t):
+        return {
+            'op': 'set', 'id': t.id, 'label': t.label, 'seconds': t.seconds,
+            'start': t.start_time, 'end': t.end_time,
+        }
+
+    def _publish(self, event, t, now):
+        payload = self._public(t, now)
+        for q in self._subscribers:
+            q.put((event, payload))
+
+    @staticmethod
+    def _public(t, now):
+        remaining = max(0, t.end_time - now) if t.active else 0
+        return {
+            'id': t.id,
+            'label': t.label,
+            'remaining': int(remaining),
+            'remaining_ms': int(remaining * 1000),
+            'total': t.seconds,
+            'active': t.active,
+        }
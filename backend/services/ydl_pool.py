@@ -0,0 +1,111 @@
+"""
+YoutubeDL Pool — reusable, pre-initialized yt-dlp instances
+Building a YoutubeDL registers every extractor and sets up its HTTP
+stack; doing that per lookup dominates short requests. Instances are
+kept per option profile, checked out one caller at a time, and
+recycled after a number of uses or any error.
+"""
+import threading
+import contextlib
+import yt_dlp
+
+
+class _Slot:
+    __slots__ = ('ydl', 'uses')
+
+    def __init__(self, ydl):
+        self.ydl = ydl
+        self.uses = 0
+
+
+class YDLPool:
+    def __init__(self, profiles, size=3, max_uses=50):
+        self.profiles = profiles
+        self.size = size
+        self.max_uses = max_uses
+        self._idle = {name: [] for name in profiles}
+        self._count = {name: 0 for name in profiles}
+        self._cond = threading.Condition()
+        self._stats = {'created': 0, 'recycled': 0, 'errors': 0, 'checkouts': 0}
+
+    @contextlib.contextmanager
+    def acquire(self, profile):
+        slot = self._checkout(profile)
+        try:
+            yield slot.ydl
+        except Exception:
+            with self._cond:
+                self._stats['errors'] += 1
+            self._discard(profile, slot)
+            raise
+        else:
+            slot.uses += 1
+            if slot.uses >= self.max_uses:
+                self._discard(profile, slot)
+            else:
+                with self._cond:
+                    self._idle[profile].append(slot)
+                    self._cond.notify()
+
+    def warm_up(self, per_profile=1):
+        """Pre-build instances and load the YouTube extractors."""
+        for name in self.profiles:
+            slots = []
+            for _ in range(min(per_profile, self.size)):
+                slot = self._checkout(name)
+                for ie in ('Youtube', 'YoutubeSearch'):
+                    try:
+                        slot.ydl.get_info_extractor(ie)
+                    except Exception:
+                        pass
+                slots.append(slot)
+            with self._cond:
+                self._idle[name].extend(slots)
+                self._cond.notify_all()
+        print(f"✅ yt-dlp pool warmed ({', '.join(self.profiles)})")
+
+    def stats(self):
+        with self._cond:
+            return {
+                **self._stats,
+                'profiles': {
+                    name: {'open': self._count[name], 'idle': len(self._idle[name])}
+                    for name in self.profiles
+                },
+                'size': self.size,
+                'max_uses': self.max_uses,
+            }
+
+    # ------------------------------------------
+    # Internal helpers
+    # ------------------------------------------
+
+    def _checkout(self, profile):
+        with self._cond:
+            while True:
+                if self._idle[profile]:
+                    self._stats['checkouts'] += 1
+                    return self._idle[profile].pop()
+                if self._count[profile] < self.size:
+                    self._count[profile] += 1
+                    self._stats['created'] += 1
+                    self._stats['checkouts'] += 1
+                    break
+                self._cond.wait()
+        try:
+            return _Slot(yt_dlp.YoutubeDL(dict(self.profiles[profile])))
+        except Exception:
+            with self._cond:
+                self._count[profile] -= 1
+                self._cond.notify()
+            raise
+
+    def _discard(self, profile, slot):
+        try:
+            slot.ydl.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._count[profile] -= 1
+            self._stats['recycled'] += 1
+            self._cond.notify()